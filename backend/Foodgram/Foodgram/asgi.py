@@ -4,4 +4,19 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Foodgram.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from api.events import EVENTS_PATH, events_application, lifespan  # noqa
+
+
+async def application(scope, receive, send):
+    """
+    Поток SSE обслуживается напрямую: потоковые ответы Django 3.2
+    в ASGI итерируются синхронно и заняли бы цикл событий.
+    Остальные запросы передаются Django.
+    """
+    if scope['type'] == 'lifespan':
+        return await lifespan(scope, receive, send)
+    if scope['type'] == 'http' and scope['path'] == EVENTS_PATH:
+        return await events_application(scope, receive, send)
+    return await django_application(scope, receive, send)
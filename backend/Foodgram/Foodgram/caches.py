@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Бэкенды, данные которых видны только текущему процессу.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_cache(alias):
+    """
+    Общий ли кеш для всех воркеров. Состояние, которое должно
+    меняться сразу во всех процессах (отзыв токена), нельзя
+    хранить в кеше процесса.
+    """
+    return settings.CACHES[alias]['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    warnings = []
+    if not is_shared_cache(settings.AUTH_TOKEN_CACHE):
+        warnings.append(Warning(
+            f'Кеш {settings.AUTH_TOKEN_CACHE!r} (AUTH_TOKEN_CACHE) '
+            'локален для процесса, кеширование токенов отключено.',
+            hint='Задайте MEMCACHED_LOCATION.',
+            id='foodgram.W001',
+        ))
+    if not is_shared_cache(settings.THROTTLE_CACHE):
+        warnings.append(Warning(
+            f'Кеш {settings.THROTTLE_CACHE!r} (THROTTLE_CACHE) локален '
+            'для процесса: у каждого воркера свои счетчики, лимиты '
+            'частоты умножаются на число воркеров.',
+            hint='Задайте MEMCACHED_LOCATION.',
+            id='foodgram.W003',
+        ))
+    if settings.DATABASE_REPLICAS and not is_shared_cache('default'):
+        warnings.append(Warning(
+            'Кеш default локален для процесса: после записи клиенты '
+            'без cookie (запросы по токену из скриптов) могут читать '
+            'с реплики устаревшие данные.',
+            hint='Задайте MEMCACHED_LOCATION.',
+            id='foodgram.W002',
+        ))
+    return warnings
@@ -0,0 +1,213 @@
+import gzip
+import hashlib
+import zlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+# Уровни сжатия: (ответы на лету, копии в кеше). Копия сжимается
+# один раз, поэтому для нее выбран более медленный и плотный уровень.
+LEVELS = {
+    'br': (4, 9),
+    'zstd': (3, 12),
+    'gzip': (6, 9),
+}
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+def load_codec(encoding):
+    """
+    Библиотека кодека или None, если она не установлена.
+    brotli и zstandard импортируются при первом сжатии,
+    а не при запуске воркера.
+    """
+    try:
+        if encoding == 'br':
+            import brotli
+            return brotli
+        if encoding == 'zstd':
+            import zstandard
+            return zstandard
+    except ImportError:
+        return None
+    return zlib
+
+
+@lru_cache(maxsize=None)
+def available_encodings():
+    """Кодировки из COMPRESSION_ENCODINGS с установленными библиотеками."""
+    return tuple(
+        encoding for encoding in settings.COMPRESSION_ENCODINGS
+        if load_codec(encoding) is not None
+    )
+
+
+def parse_accept_encoding(header):
+    """Accept-Encoding -> {кодировка: q}."""
+    accepted = {}
+    for item in header.split(','):
+        encoding, *params = item.strip().split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if encoding:
+            accepted[encoding.lower()] = quality
+    return accepted
+
+
+def negotiate(header):
+    """
+    Первая по предпочтению сервера кодировка, которую принимает клиент,
+    или None.
+    """
+    accepted = parse_accept_encoding(header)
+    for encoding in available_encodings():
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return load_codec('br').compress(data, quality=level)
+    if encoding == 'zstd':
+        return load_codec('zstd').ZstdCompressor(level=level).compress(data)
+    return gzip.compress(data, level, mtime=0)
+
+
+class StreamCompressor:
+    """
+    Потоковое сжатие: каждая часть дожимается до границы блока,
+    чтобы клиент получал данные по мере формирования ответа.
+    """
+
+    def __init__(self, encoding, level):
+        self.encoding = encoding
+        if encoding == 'br':
+            self.compressor = load_codec('br').Compressor(quality=level)
+        elif encoding == 'zstd':
+            self.compressor = load_codec('zstd').ZstdCompressor(
+                level=level
+            ).compressobj()
+        else:
+            self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data):
+        if self.encoding == 'br':
+            return self.compressor.process(data) + self.compressor.flush()
+        if self.encoding == 'zstd':
+            zstandard = load_codec('zstd')
+            return self.compressor.compress(data) + self.compressor.flush(
+                zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            )
+        return self.compressor.compress(data) + self.compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    compressor = StreamCompressor(encoding, LEVELS[encoding][0])
+    for data in chunks:
+        if data:
+            yield compressor.chunk(data)
+    yield compressor.finish()
+
+
+def compress_cached(data, content_type, encoding):
+    """
+    Сжатое тело из кеша. Ключ — хеш содержимого, поэтому одинаковые
+    ответы сжимаются один раз, а измененные никогда не отдаются
+    из устаревшей копии.
+    """
+    digest = hashlib.blake2b(data, digest_size=16)
+    digest.update(content_type.encode())
+    key = f'compressed:{encoding}:{digest.hexdigest()}'
+    content = cache.get(key)
+    if content is None:
+        content = compress(data, encoding, LEVELS[encoding][1])
+        cache.set(key, content, settings.COMPRESSION_CACHE_TIMEOUT)
+    return content
+
+
+def is_compressible(response):
+    if response.has_header('Content-Encoding') or response.status_code == 206:
+        return False
+    if 'no-transform' in response.get('Cache-Control', ''):
+        return False
+    content_type = response.get('Content-Type', '').split(';')[0].strip()
+    return (content_type.startswith('text/')
+            or content_type.endswith('+json')
+            or content_type in COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов brotli, zstd или gzip по Accept-Encoding.
+
+    Тела меньше COMPRESSION_MIN_SIZE не сжимаются, потоковые ответы
+    сжимаются по частям. Если view пометил ответ атрибутом
+    compress_once (каталог, анонимные ответы с ETag), сжатое тело берется
+    из кеша: горячий ответ сжимается один раз, а не на каждый запрос.
+    """
+
+    def __init__(self, get_response):
+        if not settings.COMPRESSION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not is_compressible(response):
+            return response
+        if (not response.streaming
+                and len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            if getattr(response, 'compress_once', False):
+                content = compress_cached(
+                    response.content, response['Content-Type'], encoding
+                )
+            else:
+                content = compress(
+                    response.content, encoding, LEVELS[encoding][0]
+                )
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+
+        # Тело изменено: сильный ETag становится слабым, как в GZipMiddleware.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,62 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+ESTIMATED_COUNT_THRESHOLD = 100000
+
+
+def estimated_count(model, using='default'):
+    """
+    Оценка количества строк таблицы по статистике PostgreSQL (pg_class).
+    Для других СУБД возвращает None.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+def estimated_counts(models, using='default'):
+    """
+    Оценки количества строк для нескольких таблиц одним запросом
+    к pg_class: {таблица: строк}. Для других СУБД — пустой словарь.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return {}
+    tables = [model._meta.db_table for model in models]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT relname, reltuples::bigint FROM pg_class '
+            'WHERE relkind = %s AND relname = ANY(%s) ORDER BY relname',
+            ['r', tables]
+        )
+        return {table: max(count, 0) for table, count in cursor.fetchall()}
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, который для больших таблиц без фильтров
+    использует оценку количества строк вместо COUNT(*).
+    Если количество уже известно (count), запросы не выполняются.
+    """
+
+    def __init__(self, *args, count=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if count is not None:
+            self.__dict__['count'] = count
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
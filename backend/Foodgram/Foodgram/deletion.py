@@ -0,0 +1,153 @@
+from collections import Counter
+
+from django.contrib import admin, messages
+from django.db.models import (CASCADE, DO_NOTHING, PROTECT, RESTRICT,
+                              SET_DEFAULT, SET_NULL, ProtectedError, signals)
+from django.db.models.deletion import get_candidate_relations_to_delete
+
+from jobs.queue import enqueue
+
+BATCH_SIZE = 5000
+
+
+def cascade_plan(queryset):
+    """
+    Обходит связи так же, как Collector Django, но без загрузки объектов:
+    связанные строки описываются подзапросами к родительскому queryset.
+    Возвращает шаги (queryset, on_delete, поле) в порядке выполнения —
+    сначала самые глубокие зависимые таблицы, последним сам queryset.
+    """
+    steps = []
+    for relation in get_candidate_relations_to_delete(queryset.model._meta):
+        field = relation.field
+        on_delete = field.remote_field.on_delete
+        if on_delete == DO_NOTHING:
+            continue
+        related = relation.related_model._base_manager.filter(
+            **{f'{field.name}__in': queryset}
+        )
+        if on_delete == CASCADE:
+            steps.extend(cascade_plan(related))
+        elif on_delete in (PROTECT, RESTRICT, SET_NULL, SET_DEFAULT):
+            steps.append((related, on_delete, field))
+        else:
+            raise ValueError(
+                f'{field.model.__name__}.{field.name}: '
+                'on_delete не поддерживается.'
+            )
+    steps.append((queryset, CASCADE, None))
+    return steps
+
+
+def deletion_summary(queryset):
+    """Количество удаляемых строк по моделям без загрузки объектов."""
+    summary = Counter()
+    for step, on_delete, _ in cascade_plan(queryset):
+        if on_delete == CASCADE:
+            summary[step.model] += step.count()
+    return summary
+
+
+def delete_objects(queryset, batch_size=BATCH_SIZE, progress=None):
+    """
+    Удаляет queryset со всеми зависимыми строками пакетами по batch_size.
+
+    Каждый пакет — один DELETE ... WHERE pk IN (SELECT ... LIMIT n),
+    строки в Python не загружаются. Модели с обработчиками
+    pre_delete/post_delete удаляются через QuerySet.delete(),
+    чтобы сигналы сработали, остальные — напрямую без Collector.
+    Удаление не атомарно: после сбоя повторный вызов продолжит
+    с места остановки.
+    progress(deleted) вызывается после каждого пакета.
+    Возвращает Counter {метка модели: удалено строк}.
+    """
+    plan = cascade_plan(queryset)
+    for step, on_delete, field in plan:
+        if on_delete in (PROTECT, RESTRICT) and step.exists():
+            raise ProtectedError(
+                f'Удаление запрещено ссылками из '
+                f'{field.model.__name__}.{field.name}.',
+                set(step[:10])
+            )
+
+    deleted = Counter()
+    for step, on_delete, field in plan:
+        if on_delete == SET_NULL:
+            step.update(**{field.name: None})
+            continue
+        if on_delete == SET_DEFAULT:
+            step.update(**{field.name: field.get_default()})
+            continue
+        if on_delete != CASCADE:
+            continue
+
+        model = step.model
+        with_signals = (signals.pre_delete.has_listeners(model)
+                        or signals.post_delete.has_listeners(model))
+        while True:
+            if with_signals:
+                pks = list(step.values_list('pk', flat=True)[:batch_size])
+                model._base_manager.filter(pk__in=pks).delete()
+                count = len(pks)
+            else:
+                batch = model._base_manager.filter(
+                    pk__in=step.values('pk')[:batch_size]
+                )
+                count = batch._raw_delete(batch.db)
+            if not count:
+                break
+            deleted[model._meta.label] += count
+            if progress is not None:
+                progress(deleted)
+    return deleted
+
+
+class CascadeDeleteAdminMixin:
+    """
+    Удаление через Foodgram.deletion: пакетные DELETE вместо Collector.
+    Страница подтверждения показывает количество строк по моделям,
+    а не список всех связанных объектов. Действие delete_in_background
+    ставит удаление в очередь фоновых задач.
+    """
+
+    actions = ('delete_in_background', )
+
+    def get_deleted_objects(self, objs, request):
+        queryset = self.model._base_manager.filter(
+            pk__in=[obj.pk for obj in objs]
+        )
+        summary = deletion_summary(queryset)
+        model_count = {
+            model._meta.verbose_name_plural: count
+            for model, count in summary.items() if count
+        }
+        perms_needed = {
+            model._meta.verbose_name for model, count in summary.items()
+            if count and not request.user.has_perm(
+                f'{model._meta.app_label}.delete_{model._meta.model_name}'
+            )
+        }
+        return [str(obj) for obj in objs], model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        delete_objects(self.model._base_manager.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        delete_objects(queryset)
+
+    @admin.action(
+        permissions=('delete', ),
+        description='Удалить выбранные объекты в фоне'
+    )
+    def delete_in_background(self, request, queryset):
+        job = enqueue(
+            'delete_objects',
+            user=request.user,
+            model=self.model._meta.label_lower,
+            pks=list(queryset.values_list('pk', flat=True))
+        )
+        self.message_user(
+            request,
+            f'Удаление поставлено в очередь, задача #{job.pk}.',
+            messages.SUCCESS
+        )
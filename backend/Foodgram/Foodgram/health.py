@@ -0,0 +1,163 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import DatabaseError, connection, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Count, Min, Q
+from django.http import JsonResponse
+from django.utils import timezone
+
+from api.authentication import CachedTokenAuthentication
+from Foodgram.db import estimated_counts
+from Foodgram.replicas import replica_states
+from jobs.models import Job
+
+READYZ_CACHE_KEY = 'readyz'
+
+_migrations_applied = False
+
+
+def migrations_applied():
+    """
+    Все миграции применены. Положительный результат запоминается:
+    граф миграций строится только до первого успешного ответа.
+    """
+    global _migrations_applied
+    if not _migrations_applied:
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        _migrations_applied = not plan
+    return _migrations_applied
+
+
+def check_database():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    return True
+
+
+def check_cache():
+    cache.set(READYZ_CACHE_KEY, 1, 10)
+    return cache.get(READYZ_CACHE_KEY) == 1
+
+
+def healthz(request):
+    """Процесс жив и отвечает. Базу данных не трогает."""
+    return JsonResponse({'status': 'ok'})
+
+
+def readyz(request):
+    """
+    Готовность принимать запросы: БД доступна,
+    миграции применены, кеш отвечает.
+    """
+    checks = {}
+    for name, check in (('database', check_database),
+                        ('migrations', migrations_applied),
+                        ('cache', check_cache)):
+        try:
+            checks[name] = check()
+        except Exception:
+            checks[name] = False
+        if not checks[name]:
+            break
+    ready = len(checks) == 3 and all(checks.values())
+    return JsonResponse(
+        {'status': 'ok' if ready else 'unavailable', 'checks': checks},
+        status=200 if ready else 503
+    )
+
+
+PROBES = {
+    '/healthz': healthz,
+    '/readyz': readyz,
+}
+
+
+class HealthCheckMiddleware:
+    """
+    Отвечает на /healthz и /readyz до остальных middleware:
+    без проверки ALLOWED_HOSTS (оркестратор обращается по IP),
+    сессий, профилирования и подсчета запросов.
+    Должен стоять первым в MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        probe = PROBES.get(request.path_info)
+        if probe is not None and request.method in ('GET', 'HEAD'):
+            return probe(request)
+        return self.get_response(request)
+
+
+def database_state(alias):
+    """
+    Состояние соединения с базой в текущем потоке.
+    Пула соединений у Django нет: каждый поток держит свое соединение
+    не дольше CONN_MAX_AGE секунд. Для PostgreSQL добавляется
+    число серверных соединений к базе по состояниям.
+    """
+    wrapper = connections[alias]
+    state = {
+        'vendor': wrapper.vendor,
+        'conn_max_age': wrapper.settings_dict['CONN_MAX_AGE'],
+        'connected': wrapper.connection is not None,
+        'in_atomic_block': wrapper.in_atomic_block,
+    }
+    replicas = replica_states()
+    if alias in replicas:
+        state['replica_healthy'] = replicas[alias]
+    if wrapper.vendor == 'postgresql':
+        try:
+            with wrapper.cursor() as cursor:
+                cursor.execute(
+                    'SELECT COALESCE(state, %s), count(*) '
+                    'FROM pg_stat_activity '
+                    'WHERE datname = current_database() GROUP BY 1',
+                    ['unknown']
+                )
+                state['server_connections'] = dict(cursor.fetchall())
+        except DatabaseError:
+            state['available'] = False
+    return state
+
+
+def cache_state():
+    """Бэкенды кешей и доля попаданий кеша аутентификации."""
+    stats = CachedTokenAuthentication.stats
+    return {
+        'backends': {
+            alias: caches[alias].__class__.__name__
+            for alias in settings.CACHES
+        },
+        'auth_token': {
+            'hits': stats['hits'],
+            'misses': stats['misses'],
+            'hit_rate': CachedTokenAuthentication.hit_rate(),
+        },
+    }
+
+
+def queue_state():
+    """Глубина очереди фоновых задач одним агрегирующим запросом."""
+    now = timezone.now()
+    return Job.objects.aggregate(
+        pending=Count('pk', filter=Q(status=Job.PENDING)),
+        due=Count('pk', filter=Q(status=Job.PENDING, run_at__lte=now)),
+        running=Count('pk', filter=Q(status=Job.RUNNING)),
+        failed=Count('pk', filter=Q(status=Job.FAILED)),
+        oldest_due=Min('run_at', filter=Q(status=Job.PENDING,
+                                          run_at__lte=now)),
+    )
+
+
+def diagnostics():
+    """Сводка состояния приложения для персонала."""
+    return {
+        'databases': {alias: database_state(alias) for alias in connections},
+        'cache': cache_state(),
+        'jobs': queue_state(),
+        'tables': estimated_counts(apps.get_models()),
+    }
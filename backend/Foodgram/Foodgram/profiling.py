@@ -0,0 +1,169 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.authentication import CachedTokenAuthentication
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+
+class StackSampler:
+    """
+    Сэмплирующий профилировщик: раз в interval секунд снимает стек
+    потока, обрабатывающего запрос, и считает одинаковые стеки.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append('{} ({}:{})'.format(
+                    code.co_name,
+                    os.path.basename(code.co_filename),
+                    frame.f_lineno
+                ))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        """Стеки в формате collapsed (flamegraph.pl, speedscope)."""
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.items()
+        )
+
+
+class QueryRecorder:
+    """Записывает SQL-запросы и время их выполнения."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'time': round(time.perf_counter() - start, 6),
+            })
+
+
+def profile_path(profile_id, extension):
+    return os.path.join(settings.PROFILING_ROOT, f'{profile_id}.{extension}')
+
+
+def list_profiles():
+    """Метаданные сохраненных профилей, новые первыми."""
+    if not os.path.isdir(settings.PROFILING_ROOT):
+        return []
+    profiles = []
+    for filename in sorted(os.listdir(settings.PROFILING_ROOT), reverse=True):
+        if filename.endswith('.json'):
+            with open(os.path.join(settings.PROFILING_ROOT, filename)) as file:
+                meta = json.load(file)
+            meta.pop('queries', None)
+            profiles.append(meta)
+    return profiles
+
+
+def save_profile(meta, collapsed):
+    os.makedirs(settings.PROFILING_ROOT, exist_ok=True)
+    with open(profile_path(meta['id'], 'folded'), 'w') as file:
+        file.write(collapsed)
+    with open(profile_path(meta['id'], 'json'), 'w') as file:
+        json.dump(meta, file, ensure_ascii=False)
+
+    files = sorted(
+        name for name in os.listdir(settings.PROFILING_ROOT)
+        if name.endswith('.json')
+    )
+    for name in files[:-settings.PROFILING_MAX_PROFILES]:
+        profile_id = name[:-len('.json')]
+        for extension in ('json', 'folded'):
+            if os.path.exists(profile_path(profile_id, extension)):
+                os.remove(profile_path(profile_id, extension))
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование запросов: доля PROFILING_SAMPLE_RATE случайных запросов
+    и запросы персонала с заголовком X-Profile: 1.
+    Сохраняются стеки (collapsed) и выполненные SQL-запросы.
+    При PROFILING_ENABLED = False middleware отключается полностью.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def should_profile(self, request):
+        if request.META.get(PROFILE_HEADER) == '1':
+            try:
+                auth = CachedTokenAuthentication().authenticate(request)
+            except AuthenticationFailed:
+                return False
+            return auth is not None and auth[0].is_staff
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        sampler = StackSampler(threading.get_ident(),
+                               settings.PROFILING_INTERVAL)
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            with sampler:
+                response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        profile_id = '{}-{:06d}'.format(
+            time.strftime('%Y%m%d%H%M%S'), random.randrange(10 ** 6)
+        )
+        save_profile({
+            'id': profile_id,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration': round(duration, 6),
+            'samples': sum(sampler.stacks.values()),
+            'query_count': len(recorder.queries),
+            'query_time': round(sum(q['time'] for q in recorder.queries), 6),
+            'queries': recorder.queries,
+        }, sampler.collapsed())
+        response['X-Profile-Id'] = profile_id
+        return response
@@ -0,0 +1,96 @@
+import logging
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Запрос выполнил больше SQL-запросов, чем разрешено бюджетом."""
+
+
+def query_budget(limit):
+    """
+    Декоратор для action ViewSet: максимальное количество
+    SQL-запросов на один вызов.
+    """
+    def decorator(func):
+        func.query_budget = limit
+        return func
+    return decorator
+
+
+def get_query_budget(view_func, method):
+    """
+    Бюджет запросов для view. Источники по убыванию приоритета:
+    атрибут query_budget метода-action, словарь {action: лимит}
+    или число в атрибуте query_budget класса view.
+    """
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return None
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    budget = getattr(getattr(cls, action, None), 'query_budget', None)
+    if budget is not None:
+        return budget
+    budget = getattr(cls, 'query_budget', None)
+    if isinstance(budget, dict):
+        return budget.get(action)
+    return budget
+
+
+def duplicated_queries(queries, limit=5):
+    """Повторяющиеся SQL-запросы — типичный признак N+1."""
+    return [
+        (sql, count) for sql, count in Counter(queries).most_common(limit)
+        if count > 1
+    ]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMiddleware:
+    """
+    Проверяет количество SQL-запросов на запрос к API против бюджета view.
+    При превышении пишет в лог повторяющиеся запросы,
+    при QUERY_BUDGET_RAISE = True выбрасывает QueryBudgetExceeded.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func, request.method)
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None and len(counter.queries) > budget:
+            message = (
+                f'{request.method} {request.path}: {len(counter.queries)} '
+                f'SQL-запросов при бюджете {budget}. '
+                f'Повторяющиеся: {duplicated_queries(counter.queries)}'
+            )
+            logger.warning(message)
+            if settings.QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(message)
+        return response
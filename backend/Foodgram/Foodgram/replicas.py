@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+from Foodgram.caches import is_shared_cache
+
+logger = logging.getLogger(__name__)
+
+use_replica = ContextVar('use_replica', default=False)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PRIMARY_ONLY_MODELS = ('authtoken.token',)
+PIN_COOKIE = 'db_pin'
+
+_health = {}
+
+
+def replica_is_healthy(alias):
+    """
+    Проверяет доступность реплики и отставание репликации.
+    Результат кешируется в процессе на REPLICA_HEALTH_CHECK_INTERVAL секунд.
+    """
+    healthy, checked_at = _health.get(alias, (True, 0))
+    if time.monotonic() - checked_at < settings.REPLICA_HEALTH_CHECK_INTERVAL:
+        return healthy
+
+    try:
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Если все полученное WAL применено, реплика не отстает:
+                # время последней транзакции растет и при простое
+                # основной базы, поэтому оно учитывается, только пока
+                # применение WAL не догнало прием.
+                cursor.execute(
+                    'SELECT CASE WHEN pg_last_wal_receive_lsn() '
+                    '= pg_last_wal_replay_lsn() THEN 0 '
+                    'ELSE COALESCE(EXTRACT(EPOCH FROM '
+                    'now() - pg_last_xact_replay_timestamp()), 0) END'
+                )
+                lag = cursor.fetchone()[0]
+            else:
+                cursor.execute('SELECT 1')
+                lag = 0
+        healthy = lag <= settings.REPLICA_MAX_LAG
+    except DatabaseError:
+        logger.warning('Реплика %s недоступна.', alias, exc_info=True)
+        healthy = False
+    _health[alias] = (healthy, time.monotonic())
+    return healthy
+
+
+def replica_states():
+    """Последний известный результат проверки каждой реплики."""
+    return {alias: healthy for alias, (healthy, _) in _health.items()}
+
+
+class ReplicaRouter:
+    """
+    Роутер баз данных: чтение в рамках безопасных запросов к API
+    уходит на исправную реплику, все остальное — на основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not use_replica.get():
+            return None
+        if model._meta.label_lower in PRIMARY_ONLY_MODELS:
+            return None
+        replicas = [
+            alias for alias in settings.DATABASE_REPLICAS
+            if replica_is_healthy(alias)
+        ]
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Включает чтение с реплик для GET/HEAD-запросов к API.
+    После успешного изменяющего запроса клиент на REPLICA_PIN_SECONDS
+    закрепляется за основной базой, чтобы видеть свои изменения.
+    Закрепление хранится в подписанной cookie, которую видят все
+    воркеры, и для клиентов без cookie — в общем кеше по токену.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def pin_key(self, request):
+        auth = request.META.get('HTTP_AUTHORIZATION')
+        if not auth or not is_shared_cache('default'):
+            return None
+        return 'db_pin:' + hashlib.sha256(auth.encode()).hexdigest()
+
+    def is_pinned(self, request, pin_key):
+        if request.get_signed_cookie(
+            PIN_COOKIE,
+            default=None,
+            salt=PIN_COOKIE,
+            max_age=settings.REPLICA_PIN_SECONDS
+        ):
+            return True
+        return bool(pin_key and cache.get(pin_key))
+
+    def pin(self, response, pin_key):
+        response.set_signed_cookie(
+            PIN_COOKIE,
+            '1',
+            salt=PIN_COOKIE,
+            max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True,
+            samesite='Lax'
+        )
+        if pin_key:
+            cache.set(pin_key, True, settings.REPLICA_PIN_SECONDS)
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        pin_key = self.pin_key(request)
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if response.status_code < 400:
+                self.pin(response, pin_key)
+            return response
+
+        replica = (request.path.startswith('/api/')
+                   and not self.is_pinned(request, pin_key))
+        token = use_replica.set(replica)
+        try:
+            return self.get_response(request)
+        finally:
+            use_replica.reset(token)
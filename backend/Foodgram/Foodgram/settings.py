@@ -23,15 +23,21 @@ INSTALLED_APPS = [
     'djoser',
     'api.apps.ApiConfig',
     'recipes.apps.RecipesConfig',
-    'users.apps.UsersConfig'
+    'users.apps.UsersConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 MIDDLEWARE = [
+    'Foodgram.health.HealthCheckMiddleware',
+    'Foodgram.compression.CompressionMiddleware',
+    'Foodgram.profiling.ProfilingMiddleware',
+    'Foodgram.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'Foodgram.replicas.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -88,15 +94,42 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
 
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
 
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
-    ]
+    ],
+
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.SlidingWindowThrottle',
+    ],
+
+    'DEFAULT_THROTTLE_RATES': {
+        'recipe_write': os.getenv('THROTTLE_RECIPE_WRITE', '60/hour'),
+        'shopping_cart': os.getenv('THROTTLE_SHOPPING_CART', '20/min'),
+        'subscriptions': os.getenv('THROTTLE_SUBSCRIPTIONS', '60/min'),
+        'export': os.getenv('THROTTLE_EXPORT', '10/hour'),
+    },
 }
 
+# Максимальный размер картинки после декодирования base64
+# и тела JSON-запроса, в байтах.
+MAX_IMAGE_SIZE = int(os.getenv('MAX_IMAGE_SIZE', 10 * 1024 * 1024))
+MAX_JSON_BODY_SIZE = int(os.getenv('MAX_JSON_BODY_SIZE', 15 * 1024 * 1024))
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'SERIALIZERS': {
@@ -122,6 +155,37 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения: DB_REPLICA_HOSTS=replica1,replica2
+DATABASE_REPLICAS = []
+for number, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['Foodgram.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', 10))
+REPLICA_HEALTH_CHECK_INTERVAL = 10
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+if os.getenv('MEMCACHED_LOCATION'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.getenv('MEMCACHED_LOCATION'),
+    }
+
+AUTH_TOKEN_CACHE = 'default'
+THROTTLE_CACHE = 'default'
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 60))
+
 AUTH_USER_MODEL = 'users.User'
 
 STATIC_URL = '/static/'
@@ -129,4 +193,48 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 
 MEDIA_URL = 'https://mahajoty.ru/media/'
 # MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+
+INGREDIENT_CATALOG_ROOT = MEDIA_ROOT / 'catalog'
+# Последняя версия каталога хранится в кеше под одним ключом.
+INGREDIENT_CATALOG_CACHE_TIMEOUT = int(
+    os.getenv('INGREDIENT_CATALOG_CACHE_TIMEOUT', 60 * 60)
+)
+
+# nginx: файлы отдаются через X-Accel-Redirect, simple: потоком из Django.
+SENDFILE_BACKEND = os.getenv('SENDFILE_BACKEND', 'simple' if DEBUG else 'nginx')
+SENDFILE_URL_PREFIX = '/protected/media/'
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 30
+
+# Почти одинаковые рецепты при создании: off — не проверять,
+# flag — сохранять с отметкой для модерации, reject — отклонять.
+RECIPE_DUPLICATES = os.getenv('RECIPE_DUPLICATES', 'flag')
+RECIPE_DUPLICATE_THRESHOLD = float(
+    os.getenv('RECIPE_DUPLICATE_THRESHOLD', 0.8)
+)
+
+# Сжатие ответов: кодировки в порядке предпочтения, минимальный
+# размер тела и время жизни сжатых копий горячих ответов в кеше.
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True') == 'True'
+COMPRESSION_ENCODINGS = ('br', 'zstd', 'gzip')
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_CACHE_TIMEOUT = int(os.getenv('COMPRESSION_CACHE_TIMEOUT', 600))
+
+# Интервал комментариев-пингов в потоке событий /api/events/, секунд.
+EVENTS_HEARTBEAT_INTERVAL = int(os.getenv('EVENTS_HEARTBEAT_INTERVAL', 15))
+# Время жизни билета для подключения к потоку и окно переподключения
+# после закрытия потока, секунд.
+EVENTS_TICKET_MAX_AGE = int(os.getenv('EVENTS_TICKET_MAX_AGE', 60))
+
+# Профилирование запросов: доля случайных запросов
+# и запросы персонала с заголовком X-Profile: 1.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_INTERVAL = 0.005
+PROFILING_ROOT = BASE_DIR / 'profiles'
+PROFILING_MAX_PROFILES = 200
+
+# Бюджет SQL-запросов на запрос к API (атрибут query_budget у view).
+# Превышение пишется в лог; в CI его ловит check_query_budgets.
+QUERY_BUDGET_ENABLED = os.getenv('QUERY_BUDGET_ENABLED', 'True') == 'True'
+QUERY_BUDGET_RAISE = os.getenv('QUERY_BUDGET_RAISE', 'False') == 'True'
@@ -1,7 +1,11 @@
 from django.contrib import admin
 from django.urls import include, path
 
+from Foodgram.health import healthz, readyz
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/', include('api.urls', namespace='api'))
+    path('api/', include('api.urls', namespace='api')),
+    path('healthz', healthz, name='healthz'),
+    path('readyz', readyz, name='readyz'),
 ]
@@ -0,0 +1,30 @@
+from django.apps import apps
+from django.db import connections
+from django.urls import get_resolver
+from rest_framework.serializers import Serializer
+
+
+def warmup():
+    """
+    Прогрев приложения до форка воркеров gunicorn (preload_app):
+    URL-резолвер, метаданные моделей и поля сериализаторов
+    создаются один раз в мастер-процессе и разделяются воркерами.
+    """
+    from api import serializers
+
+    resolver = get_resolver()
+    resolver.reverse_dict
+    resolver.app_dict
+
+    for model in apps.get_models():
+        model._meta.get_fields()
+
+    for name in dir(serializers):
+        serializer_class = getattr(serializers, name)
+        if (isinstance(serializer_class, type)
+                and issubclass(serializer_class, Serializer)
+                and hasattr(serializer_class, 'Meta')):
+            serializer_class().fields
+
+    # Соединения с БД не должны наследоваться воркерами после форка.
+    connections.close_all()
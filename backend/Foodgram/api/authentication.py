@@ -0,0 +1,55 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+from Foodgram.caches import is_shared_cache
+
+
+def token_cache_key(key):
+    """Ключ кеша для токена. Сам токен в ключе не хранится."""
+    return 'auth_token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_token(key):
+    """Удаляет токен из кеша аутентификации."""
+    caches[settings.AUTH_TOKEN_CACHE].delete(token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену с кешированием пары токен -> пользователь.
+    Кеш сбрасывается при выходе, изменении и удалении пользователя
+    (см. api.signals). Сброс должен быть виден всем воркерам, поэтому
+    с кешем процесса (LocMem) токены не кешируются.
+    """
+
+    stats = {'hits': 0, 'misses': 0}
+    stats_lock = threading.Lock()
+
+    @classmethod
+    def hit_rate(cls):
+        """Доля запросов, аутентифицированных из кеша."""
+        total = cls.stats['hits'] + cls.stats['misses']
+        return cls.stats['hits'] / total if total else None
+
+    def count(self, name):
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def authenticate_credentials(self, key):
+        if not is_shared_cache(settings.AUTH_TOKEN_CACHE):
+            return super().authenticate_credentials(key)
+        cache = caches[settings.AUTH_TOKEN_CACHE]
+        cache_key = token_cache_key(key)
+        token = cache.get(cache_key)
+        if token is not None:
+            self.count('hits')
+            return (token.user, token)
+
+        self.count('misses')
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, token, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+        return (user, token)
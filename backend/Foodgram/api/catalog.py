@@ -0,0 +1,111 @@
+import gzip
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+
+from api.renderers import ORJSONRenderer
+from recipes.models import Ingredient, IngredientChange
+from recipes.units import NUTRITION_FIELDS
+
+CATALOG_FIELDS = ('id', 'name', 'measurement_unit', *NUTRITION_FIELDS)
+CATALOG_FILENAME = 'ingredients.json'
+CATALOG_CACHE_KEY = 'ingredient_catalog'
+
+
+def render_json(data):
+    """Сериализует данные каталога в компактный JSON."""
+    return ORJSONRenderer().render(data)
+
+
+def catalog_version():
+    """Текущая версия каталога: id последней записи журнала изменений."""
+    return IngredientChange.objects.aggregate(
+        version=Max('pk')
+    )['version'] or 0
+
+
+def columns(rows):
+    """Преобразует строки с полями CATALOG_FIELDS в колонки."""
+    data = {field: [] for field in CATALOG_FIELDS}
+    for row in rows:
+        for field, value in zip(CATALOG_FIELDS, row):
+            data[field].append(value)
+    return data
+
+
+def build_catalog(version):
+    """Полный каталог ингредиентов в колоночном формате."""
+    rows = Ingredient.objects.order_by('pk').values_list(*CATALOG_FIELDS)
+    return render_json({
+        'version': version,
+        'fields': CATALOG_FIELDS,
+        **columns(rows),
+    })
+
+
+def get_catalog(version):
+    """
+    Полный каталог указанной версии в виде байтов. В кеше лежит
+    только последняя версия под одним ключом: новая версия заменяет
+    прежнюю, а не копится рядом с ней.
+    """
+    cached = cache.get(CATALOG_CACHE_KEY)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    content = build_catalog(version)
+    # Запрос, прочитавший устаревшую версию, не вытесняет более новую.
+    if cached is None or cached[0] < version:
+        cache.set(CATALOG_CACHE_KEY, (version, content),
+                  settings.INGREDIENT_CATALOG_CACHE_TIMEOUT)
+    return content
+
+
+def build_delta(since, version):
+    """
+    Изменения каталога после версии since:
+    актуальные данные измененных ингредиентов и id удаленных.
+    """
+    changed_ids = set(IngredientChange.objects.filter(
+        pk__gt=since,
+        pk__lte=version
+    ).values_list('ingredient_id', flat=True))
+    rows = list(Ingredient.objects.filter(
+        pk__in=changed_ids
+    ).order_by('pk').values_list(*CATALOG_FIELDS))
+    return render_json({
+        'version': version,
+        'since': since,
+        'fields': CATALOG_FIELDS,
+        **columns(rows),
+        'deleted': sorted(changed_ids - {row[0] for row in rows}),
+    })
+
+
+def write_catalog_artifacts(directory=None):
+    """
+    Сохраняет полный каталог и его копию .gz для отдачи nginx
+    напрямую (gzip_static). Копия .br не пишется: в образе nginx
+    нет модуля ngx_brotli. Возвращает версию каталога.
+    """
+    directory = directory or settings.INGREDIENT_CATALOG_ROOT
+    os.makedirs(directory, exist_ok=True)
+    version = catalog_version()
+    content = build_catalog(version)
+
+    artifacts = {
+        CATALOG_FILENAME: content,
+        CATALOG_FILENAME + '.gz': gzip.compress(content, 9, mtime=0),
+    }
+    # Копия .br, оставшаяся от прежних сборок, устарела бы.
+    stale = os.path.join(directory, CATALOG_FILENAME + '.br')
+    if os.path.exists(stale):
+        os.remove(stale)
+
+    for filename, data in artifacts.items():
+        path = os.path.join(directory, filename)
+        with open(path + '.tmp', 'wb') as file:
+            file.write(data)
+        os.replace(path + '.tmp', path)
+    return version
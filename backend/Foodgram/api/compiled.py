@@ -0,0 +1,153 @@
+from collections import defaultdict
+
+from recipes.models import Amount, Favorite, Recipe, ShoppingList
+from recipes.units import NUTRITION_FIELDS
+from users.models import Subscription, User
+
+
+class ValuesSerializer:
+    """
+    Базовый класс скомпилированного сериализатора для чтения.
+    Строит ответ напрямую из строк .values(), минуя создание
+    экземпляров моделей и to_representation полей DRF.
+    """
+
+    fields = ()
+
+    def __init__(self, rows, context=None):
+        self.rows = rows
+        self.context = context or {}
+
+    @classmethod
+    def get_rows(cls, queryset):
+        """Queryset строк, из которых строится ответ."""
+        return queryset.values(*cls.fields)
+
+    def to_representation(self, rows):
+        return list(rows)
+
+    @property
+    def data(self):
+        return self.to_representation(self.rows)
+
+
+class TagValuesSerializer(ValuesSerializer):
+    """Аналог TagSerializer."""
+
+    fields = ('id', 'name', 'color', 'slug')
+
+
+class IngredientValuesSerializer(ValuesSerializer):
+    """Аналог IngredientSerializer."""
+
+    fields = ('id', 'name', 'measurement_unit', *NUTRITION_FIELDS)
+
+
+class RecipeValuesSerializer(ValuesSerializer):
+    """
+    Аналог RecipeSerializerRead.
+    Связанные данные загружаются одним запросом на каждую связь
+    для всей страницы, а не на каждый рецепт.
+    """
+
+    fields = ('id', 'author_id', 'name', 'image', 'text', 'cooking_time',
+              *NUTRITION_FIELDS)
+
+    def get_image_url(self, name):
+        if not name:
+            return None
+        url = Recipe._meta.get_field('image').storage.url(name)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+    def get_tags(self, recipe_ids):
+        tags = defaultdict(list)
+        rows = Recipe.tags.through.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('pk').values_list(
+            'recipe_id', 'tag__id', 'tag__name', 'tag__color', 'tag__slug'
+        )
+        for recipe_id, tag_id, name, color, slug in rows:
+            tags[recipe_id].append(
+                {'id': tag_id, 'name': name, 'color': color, 'slug': slug}
+            )
+        return tags
+
+    def get_ingredients(self, recipe_ids):
+        ingredients = defaultdict(list)
+        rows = Amount.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('pk').values_list(
+            'recipe_id', 'ingredient__id', 'ingredient__name',
+            'ingredient__measurement_unit', 'amount'
+        )
+        for recipe_id, ingredient_id, name, unit, amount in rows:
+            ingredients[recipe_id].append({
+                'id': ingredient_id,
+                'name': name,
+                'measurement_unit': unit,
+                'amount': amount
+            })
+        return ingredients
+
+    def get_authors(self, author_ids, user):
+        subscribed = set()
+        if user.is_authenticated:
+            subscribed = set(Subscription.objects.filter(
+                user=user,
+                author_id__in=author_ids
+            ).values_list('author_id', flat=True))
+        authors = {}
+        rows = User.objects.filter(pk__in=author_ids).values_list(
+            'email', 'id', 'username', 'first_name', 'last_name'
+        )
+        for email, user_id, username, first_name, last_name in rows:
+            authors[user_id] = {
+                'email': email,
+                'id': user_id,
+                'username': username,
+                'first_name': first_name,
+                'last_name': last_name,
+                'is_subscribed': user_id in subscribed
+            }
+        return authors
+
+    def get_user_recipes(self, model, recipe_ids, user):
+        if not user.is_authenticated:
+            return set()
+        return set(model.objects.filter(
+            user=user,
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True))
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        if not rows:
+            return []
+        user = self.context['request'].user
+        recipe_ids = [row['id'] for row in rows]
+
+        tags = self.get_tags(recipe_ids)
+        ingredients = self.get_ingredients(recipe_ids)
+        authors = self.get_authors({row['author_id'] for row in rows}, user)
+        favorited = self.get_user_recipes(Favorite, recipe_ids, user)
+        in_cart = self.get_user_recipes(ShoppingList, recipe_ids, user)
+
+        return [
+            {
+                'id': row['id'],
+                'tags': tags[row['id']],
+                'author': authors[row['author_id']],
+                'ingredients': ingredients[row['id']],
+                'is_favorited': row['id'] in favorited,
+                'is_in_shopping_cart': row['id'] in in_cart,
+                'name': row['name'],
+                'image': self.get_image_url(row['image']),
+                'text': row['text'],
+                'cooking_time': row['cooking_time'],
+                **{field: row[field] for field in NUTRITION_FIELDS},
+            }
+            for row in rows
+        ]
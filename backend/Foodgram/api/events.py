@@ -0,0 +1,393 @@
+import asyncio
+import json
+import logging
+import secrets
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+import psycopg2
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import (close_old_connections, connection, connections,
+                       transaction)
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.authentication import CachedTokenAuthentication
+from recipes.models import Recipe
+from users.models import Subscription, User
+
+logger = logging.getLogger(__name__)
+
+EVENTS_PATH = '/api/events/'
+CHANNEL = 'foodgram_events'
+QUEUE_SIZE = 100
+REPLAY_LIMIT = 50
+RECONNECT_DELAY = 1
+TICKET_SALT = 'foodgram.events'
+
+
+def publish(event):
+    """
+    Публикует событие для потоков SSE.
+    На PostgreSQL — через NOTIFY: событие доставляется всем процессам
+    и только после фиксации транзакции. На других СУБД — брокеру
+    текущего процесса после фиксации транзакции.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)',
+                           [CHANNEL, json.dumps(event)])
+    else:
+        transaction.on_commit(lambda: broker.publish(event))
+
+
+def publish_recipe(recipe):
+    publish({
+        'type': 'recipe',
+        'id': recipe.pk,
+        'author': recipe.author_id,
+        'name': recipe.name,
+    })
+
+
+def publish_subscription(user_id, author_id, active):
+    publish({
+        'type': 'subscription',
+        'user': user_id,
+        'author': author_id,
+        'active': active,
+    })
+
+
+class Client:
+    """Подключенный клиент: его подписки и очередь событий."""
+
+    def __init__(self, user_id, authors):
+        self.user_id = user_id
+        self.authors = set(authors)
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.overflow = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Медленный клиент отключается и при переподключении
+            # получает пропущенное по Last-Event-ID.
+            self.overflow = True
+
+
+class PostgresListener:
+    """
+    LISTEN на отдельном соединении psycopg2. Уведомления читаются
+    из цикла событий через add_reader, без отдельного потока.
+    """
+
+    def __init__(self, on_event):
+        self.on_event = on_event
+        self.conn = None
+
+    async def start(self, loop):
+        params = connections['default'].get_connection_params()
+        while True:
+            try:
+                self.conn = await loop.run_in_executor(
+                    None, lambda: psycopg2.connect(**params)
+                )
+                self.conn.autocommit = True
+                with self.conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                break
+            except psycopg2.Error:
+                logger.warning('Нет соединения для LISTEN.', exc_info=True)
+                await asyncio.sleep(RECONNECT_DELAY)
+        loop.add_reader(self.conn.fileno(), self.poll, loop)
+
+    def poll(self, loop):
+        try:
+            self.conn.poll()
+        except psycopg2.Error:
+            logger.warning('Соединение LISTEN потеряно.', exc_info=True)
+            self.stop(loop)
+            loop.create_task(self.start(loop))
+            return
+        while self.conn.notifies:
+            notify = self.conn.notifies.pop(0)
+            self.on_event(json.loads(notify.payload))
+
+    def stop(self, loop):
+        if self.conn is not None:
+            loop.remove_reader(self.conn.fileno())
+            self.conn.close()
+            self.conn = None
+
+
+class Broker:
+    """
+    Брокер событий процесса: раздает события очередям клиентов
+    по автору рецепта. Работает в цикле событий ASGI-сервера.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.listener = None
+        self.by_author = defaultdict(set)
+        self.by_user = defaultdict(set)
+
+    async def start(self):
+        if self.loop is not None:
+            return
+        self.loop = asyncio.get_running_loop()
+        if connection.vendor == 'postgresql':
+            self.listener = PostgresListener(self.dispatch)
+            await self.listener.start(self.loop)
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop(self.loop)
+        self.loop = self.listener = None
+
+    def publish(self, event):
+        """Передает событие в цикл событий. Вызывается из любого потока."""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.dispatch, event)
+
+    def dispatch(self, event):
+        if event['type'] == 'recipe':
+            for client in self.by_author.get(event['author'], ()):
+                client.put(event)
+        elif event['type'] == 'subscription':
+            for client in self.by_user.get(event['user'], ()):
+                if event['active']:
+                    client.authors.add(event['author'])
+                    self.by_author[event['author']].add(client)
+                else:
+                    client.authors.discard(event['author'])
+                    self.discard(self.by_author, event['author'], client)
+
+    def add(self, client):
+        self.by_user[client.user_id].add(client)
+        for author_id in client.authors:
+            self.by_author[author_id].add(client)
+
+    def remove(self, client):
+        self.discard(self.by_user, client.user_id, client)
+        for author_id in client.authors:
+            self.discard(self.by_author, author_id, client)
+
+    @staticmethod
+    def discard(index, key, client):
+        clients = index.get(key)
+        if clients is not None:
+            clients.discard(client)
+            if not clients:
+                del index[key]
+
+
+broker = Broker()
+
+
+def format_event(event):
+    data = json.dumps(
+        {'id': event['id'], 'author': event['author'], 'name': event['name']},
+        ensure_ascii=False
+    )
+    return f'id: {event["id"]}\nevent: recipe\ndata: {data}\n\n'
+
+
+def issue_ticket(user):
+    """
+    Билет для адреса потока: браузерный EventSource не умеет
+    передавать заголовки, а адрес с постоянным токеном попал бы
+    в журналы nginx и gunicorn. Билет подписан и привязан
+    к пользователю, для первого подключения действует
+    EVENTS_TICKET_MAX_AGE секунд.
+    """
+    return signing.dumps(
+        {'user': user.pk, 'nonce': secrets.token_urlsafe(12)},
+        salt=TICKET_SALT
+    )
+
+
+def ticket_key(data):
+    return f'events_ticket:{data["nonce"]}'
+
+
+def redeem_ticket(ticket):
+    """
+    id пользователя по билету или None. После EVENTS_TICKET_MAX_AGE
+    билет принимается только для переподключения EventSource к тому
+    же адресу: пока поток по нему открыт или закрылся не дольше
+    EVENTS_TICKET_MAX_AGE секунд назад (keep_ticket).
+    """
+    try:
+        data = signing.loads(ticket, salt=TICKET_SALT,
+                             max_age=settings.EVENTS_TICKET_MAX_AGE)
+    except signing.SignatureExpired:
+        data = signing.loads(ticket, salt=TICKET_SALT)
+        if cache.get(ticket_key(data)) != data['user']:
+            return None
+    except signing.BadSignature:
+        return None
+    return data['user']
+
+
+@sync_to_async
+def keep_ticket(ticket):
+    """
+    Продлевает переподключение по билету открытого потока.
+    Вызывается при подключении, на каждом ping и при закрытии.
+    """
+    data = signing.loads(ticket, salt=TICKET_SALT)
+    cache.set(ticket_key(data), data['user'], settings.EVENTS_TICKET_MAX_AGE)
+
+
+def get_credentials(scope):
+    """
+    ('token', ключ) из заголовка Authorization, ('ticket', билет)
+    из параметра ticket или (None, None). Токен в адресе
+    не принимается.
+    """
+    headers = dict(scope['headers'])
+    auth = headers.get(b'authorization', b'').decode().split()
+    if len(auth) == 2 and auth[0].lower() == 'token':
+        return 'token', auth[1]
+    query = parse_qs(scope['query_string'].decode())
+    if 'ticket' in query:
+        return 'ticket', query['ticket'][0]
+    return None, None
+
+
+def authenticate(kind, value):
+    if kind == 'token':
+        try:
+            user, _ = CachedTokenAuthentication().authenticate_credentials(
+                value
+            )
+        except AuthenticationFailed:
+            return None
+        return user
+    user_id = redeem_ticket(value)
+    if user_id is None:
+        return None
+    return User.objects.filter(pk=user_id, is_active=True).first()
+
+
+@sync_to_async
+def load_client_state(kind, value, last_event_id):
+    """Пользователь по токену или билету, подписки и пропущенные рецепты."""
+    try:
+        user = authenticate(kind, value)
+        if user is None:
+            return None, (), []
+        authors = list(Subscription.objects.filter(
+            user=user
+        ).values_list('author_id', flat=True))
+        missed = []
+        if last_event_id.isdigit():
+            missed = [
+                {'id': pk, 'author': author_id, 'name': name}
+                for pk, author_id, name in Recipe.objects.filter(
+                    author_id__in=authors, pk__gt=int(last_event_id)
+                ).order_by('pk').values_list(
+                    'pk', 'author_id', 'name'
+                )[:REPLAY_LIMIT]
+            ]
+        return user, authors, missed
+    finally:
+        close_old_connections()
+
+
+async def send_json(send, status, data):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': json.dumps(data, ensure_ascii=False).encode(),
+    })
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def events_application(scope, receive, send):
+    """
+    Поток SSE о новых рецептах авторов, на которых подписан пользователь.
+    Каждое соединение — корутина с очередью, без потока на клиента.
+    Пропущенные рецепты досылаются по заголовку Last-Event-ID.
+    Браузер подключается с билетом ?ticket= и переподключается
+    к тому же адресу: билет открытого потока продлевается.
+    """
+    if 'token' in parse_qs(scope['query_string'].decode()):
+        await send_json(send, 401, {'detail': 'Токен в адресе не принимается, '
+                                              'используйте ticket.'})
+        return
+    kind, value = get_credentials(scope)
+    last_event_id = dict(scope['headers']).get(b'last-event-id', b'').decode()
+    user, authors, missed = (
+        await load_client_state(kind, value, last_event_id) if value
+        else (None, (), [])
+    )
+    if user is None:
+        await send_json(send, 401, {'detail': 'Учетные данные не были '
+                                              'предоставлены.'})
+        return
+
+    if kind == 'ticket':
+        await keep_ticket(value)
+    await broker.start()
+    client = Client(user.pk, authors)
+    broker.add(client)
+    disconnect = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        body = 'retry: 5000\n\n' + ''.join(map(format_event, missed))
+        while not disconnect.done() and not client.overflow:
+            await send({'type': 'http.response.body',
+                        'body': body.encode(), 'more_body': True})
+            event = asyncio.ensure_future(client.queue.get())
+            await asyncio.wait(
+                (event, disconnect),
+                timeout=settings.EVENTS_HEARTBEAT_INTERVAL,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if event.done():
+                body = format_event(event.result())
+            else:
+                event.cancel()
+                body = ': ping\n\n'
+                if kind == 'ticket':
+                    await keep_ticket(value)
+        if not disconnect.done():
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        broker.remove(client)
+        disconnect.cancel()
+        if kind == 'ticket':
+            await keep_ticket(value)
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            broker.stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
@@ -0,0 +1,183 @@
+import json
+import os
+import zipfile
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+
+from recipes.models import (Amount, Favorite, MealPlan, Recipe, ShoppingList,
+                            Tag)
+from users.models import Subscription
+
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+
+
+class ZipBuffer:
+    """
+    Приемник для zipfile без seek и tell: zipfile пишет локальные
+    заголовки с дескриптором данных, а накопленные байты забираются
+    по мере записи.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+def json_array(items):
+    """JSON-массив по элементам, без сборки списка в памяти."""
+    yield b'['
+    for number, item in enumerate(items):
+        yield (',\n' if number else '\n').encode()
+        yield json.dumps(
+            item, cls=DjangoJSONEncoder, ensure_ascii=False
+        ).encode()
+    yield b'\n]\n'
+
+
+def image_name(recipe_id, image):
+    return f'images/{recipe_id}{os.path.splitext(image)[1]}'
+
+
+def export_recipes(user):
+    """
+    Рецепты пользователя с ингредиентами. Рецепты и ингредиенты
+    читаются двумя курсорами, упорядоченными по id рецепта,
+    и сливаются по мере чтения.
+    """
+    tags = dict(Tag.objects.values_list('pk', 'slug'))
+    amounts = groupby(
+        Amount.objects.filter(recipe__author=user).order_by(
+            'recipe_id', 'pk'
+        ).values_list(
+            'recipe_id',
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            'amount'
+        ).iterator(chunk_size=CHUNK_SIZE),
+        key=itemgetter(0)
+    )
+    recipe_id, group = next(amounts, (None, ()))
+    for recipe in Recipe.objects.filter(author=user).order_by('pk').values(
+        'pk', 'name', 'text', 'cooking_time', 'tag_ids', 'image',
+        'updated_at'
+    ).iterator(chunk_size=CHUNK_SIZE):
+        while recipe_id is not None and recipe_id < recipe['pk']:
+            recipe_id, group = next(amounts, (None, ()))
+        ingredients = []
+        if recipe_id == recipe['pk']:
+            ingredients = [
+                {'name': name, 'measurement_unit': unit, 'amount': amount}
+                for _, name, unit, amount in group
+            ]
+        yield {
+            'id': recipe['pk'],
+            'name': recipe['name'],
+            'text': recipe['text'],
+            'cooking_time': recipe['cooking_time'],
+            'tags': [tags[pk] for pk in recipe['tag_ids'] if pk in tags],
+            'ingredients': ingredients,
+            'image': image_name(recipe['pk'], recipe['image']),
+            'updated_at': recipe['updated_at'],
+        }
+
+
+def export_recipe_links(model, user):
+    for recipe_id, name in model.objects.filter(user=user).order_by(
+        'pk'
+    ).values_list('recipe_id', 'recipe__name').iterator(
+        chunk_size=CHUNK_SIZE
+    ):
+        yield {'id': recipe_id, 'name': name}
+
+
+def export_meal_plan(user):
+    for day, recipe_id, name, servings in MealPlan.objects.filter(
+        user=user
+    ).order_by('day', 'pk').values_list(
+        'day', 'recipe_id', 'recipe__name', 'servings'
+    ).iterator(chunk_size=CHUNK_SIZE):
+        yield {'day': day, 'recipe': {'id': recipe_id, 'name': name},
+               'servings': servings}
+
+
+def export_subscriptions(user):
+    for author_id, username in Subscription.objects.filter(
+        user=user
+    ).order_by('pk').values_list(
+        'author_id', 'author__username'
+    ).iterator(chunk_size=CHUNK_SIZE):
+        yield {'id': author_id, 'username': username}
+
+
+def export_sections(user):
+    """Файлы JSON архива: (имя, элементы)."""
+    return (
+        ('profile.json', [{
+            'id': user.pk,
+            'email': user.email,
+            'username': user.username,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'date_joined': user.date_joined,
+        }]),
+        ('recipes.json', export_recipes(user)),
+        ('favorites.json', export_recipe_links(Favorite, user)),
+        ('shopping_list.json', export_recipe_links(ShoppingList, user)),
+        ('meal_plan.json', export_meal_plan(user)),
+        ('subscriptions.json', export_subscriptions(user)),
+    )
+
+
+def export_archive(user):
+    """
+    Архив ZIP с данными пользователя: JSON-файлы и картинки
+    рецептов. Отдается частями по мере формирования, память
+    не зависит от объема данных: строки читаются курсорами,
+    картинки копируются блоками. Картинки уже сжаты
+    и записываются без сжатия.
+    """
+    buffer = ZipBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, items in export_sections(user):
+            with archive.open(name, 'w') as entry:
+                for data in json_array(items):
+                    entry.write(data)
+                    if buffer.size >= BUFFER_SIZE:
+                        yield buffer.pop()
+
+        for recipe_id, image in Recipe.objects.filter(author=user).order_by(
+            'pk'
+        ).values_list('pk', 'image').iterator(chunk_size=CHUNK_SIZE):
+            if not image or not default_storage.exists(image):
+                continue
+            info = zipfile.ZipInfo(image_name(recipe_id, image))
+            info.compress_type = zipfile.ZIP_STORED
+            with default_storage.open(image) as source, \
+                    archive.open(info, 'w') as entry:
+                for data in source.chunks(BUFFER_SIZE):
+                    entry.write(data)
+                    if buffer.size >= BUFFER_SIZE:
+                        yield buffer.pop()
+    yield buffer.pop()
+
+
+def export_filename(user):
+    return f'foodgram_{user.username}.zip'
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+
+from Foodgram.compression import (LEVELS, available_encodings, compress,
+                                  compress_cached)
+
+URLS = (
+    '/api/recipes/?limit=50',
+    '/api/ingredients/',
+    '/api/ingredients/catalog/',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет сжатие ответов API: процессорное время и размер '
+        'для каждой кодировки на уровне сжатия на лету и на уровне '
+        'кешируемой копии, а также отдачу сжатой копии из кеша.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--url', action='append',
+                            help='Адрес ответа, по умолчанию '
+                                 'список рецептов и ингредиентов '
+                                 'и каталог ингредиентов.')
+
+    def measure(self, func, repeat):
+        start = time.process_time()
+        for _ in range(repeat):
+            result = func()
+        return (time.process_time() - start) / repeat, result
+
+    def handle(self, *args, **options):
+        encodings = available_encodings()
+        if not encodings:
+            raise CommandError('Нет доступных кодировок сжатия.')
+        client = APIClient(HTTP_ACCEPT_ENCODING='identity')
+        repeat = options['repeat']
+
+        for url in options['url'] or URLS:
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: статус {response.status_code}.')
+            body = response.content
+            content_type = response['Content-Type']
+            self.stdout.write(f'{url}: {len(body)} байт')
+            for encoding in encodings:
+                for label, level in zip(('на лету', 'копия'),
+                                        LEVELS[encoding]):
+                    duration, content = self.measure(
+                        lambda: compress(body, encoding, level), repeat
+                    )
+                    self.stdout.write(
+                        f'  {encoding} {label} (уровень {level}): '
+                        f'{len(content)} байт '
+                        f'({len(content) / len(body):.1%}), '
+                        f'{duration * 1000:.2f} мс'
+                    )
+                compress_cached(body, content_type, encoding)
+                duration, _ = self.measure(
+                    lambda: compress_cached(body, content_type, encoding),
+                    repeat
+                )
+                self.stdout.write(
+                    f'  {encoding} из кеша: {duration * 1000:.2f} мс'
+                )
@@ -0,0 +1,91 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from Foodgram.deletion import delete_objects
+from recipes.models import (Amount, Favorite, Ingredient, Recipe,
+                            ShoppingList, Tag)
+from users.models import Subscription, User
+
+PREFIX = 'benchmark_delete_'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает удаление пользователя с большим числом рецептов '
+        'через Collector Django и через Foodgram.deletion. '
+        'Создает и удаляет только собственные тестовые данные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=10000,
+                            help='Сколько рецептов у удаляемого автора.')
+        parser.add_argument('--fans', type=int, default=5,
+                            help='Сколько пользователей добавили каждый '
+                                 'рецепт в избранное.')
+
+    def create_author(self, recipes, fans):
+        author = User.objects.create(
+            username=f'{PREFIX}author', email=f'{PREFIX}author@example.com'
+        )
+        ingredients = list(Ingredient.objects.all()[:2])
+        tag = Tag.objects.first()
+        Recipe.objects.bulk_create(
+            Recipe(author=author, name=f'Рецепт {number}', text='-',
+                   cooking_time=1, image='recipes/benchmark.png')
+            for number in range(recipes)
+        )
+        recipe_ids = list(author.recipes.values_list('pk', flat=True))
+        Amount.objects.bulk_create(
+            Amount(recipe_id=recipe_id, ingredient=ingredient, amount=1)
+            for recipe_id in recipe_ids for ingredient in ingredients
+        )
+        if tag is not None:
+            Recipe.tags.through.objects.bulk_create(
+                Recipe.tags.through(recipe_id=recipe_id, tag=tag)
+                for recipe_id in recipe_ids
+            )
+        for model in (Favorite, ShoppingList):
+            model.objects.bulk_create(
+                model(user=fan, recipe_id=recipe_id)
+                for fan in fans for recipe_id in recipe_ids
+            )
+        Subscription.objects.bulk_create(
+            Subscription(user=fan, author=author) for fan in fans
+        )
+        return author
+
+    def measure(self, label, delete):
+        tracemalloc.start()
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            delete()
+        duration = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.stdout.write(
+            f'{label}: {duration:.2f} с, SQL-запросов {len(queries)}, '
+            f'пик памяти {peak / 2 ** 20:.1f} МБ'
+        )
+
+    def handle(self, *args, **options):
+        fans = User.objects.bulk_create(
+            User(username=f'{PREFIX}fan_{number}',
+                 email=f'{PREFIX}fan_{number}@example.com')
+            for number in range(options['fans'])
+        )
+        fans = list(User.objects.filter(username__startswith=f'{PREFIX}fan_'))
+        try:
+            author = self.create_author(options['recipes'], fans)
+            self.measure('Collector (User.delete)', author.delete)
+
+            author = self.create_author(options['recipes'], fans)
+            self.measure(
+                'Foodgram.deletion',
+                lambda: delete_objects(User.objects.filter(pk=author.pk))
+            )
+        finally:
+            User.objects.filter(username__startswith=PREFIX).delete()
@@ -0,0 +1,167 @@
+from timeit import default_timer
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.compiled import (IngredientValuesSerializer, RecipeValuesSerializer,
+                          TagValuesSerializer)
+from api.renderers import ORJSONRenderer
+from api.serializers import (IngredientSerializer, RecipeSerializerRead,
+                             TagSerializer)
+from api.utils import add_ingredients
+from recipes.models import (Favorite, Ingredient, Recipe, ShoppingList,
+                            Tag)
+from users.models import Subscription, User
+
+PREFIX = 'benchmark_serializers_'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает стандартные сериализаторы DRF + JSONRenderer '
+        'со скомпилированными сериализаторами + ORJSONRenderer: '
+        'проверяет совпадение ответа и замеряет время. '
+        'С --check только сравнивает ответы на собственных данных '
+        'в откатываемой транзакции (для CI).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--limit', type=int, default=50,
+                            help='Количество рецептов в выборке.')
+        parser.add_argument('--user', type=int,
+                            help='id пользователя, от имени которого '
+                                 'выполняется запрос.')
+        parser.add_argument('--check', action='store_true',
+                            help='Без замеров: сравнить ответы '
+                                 'для анонима и пользователя с избранным, '
+                                 'списком покупок и подписками.')
+
+    def get_cases(self, limit):
+        return (
+            ('tags', Tag.objects.all(), TagSerializer, TagValuesSerializer),
+            ('ingredients', Ingredient.objects.all(),
+             IngredientSerializer, IngredientValuesSerializer),
+            ('recipes', Recipe.objects.all()[:limit],
+             RecipeSerializerRead, RecipeValuesSerializer),
+        )
+
+    def get_context(self, user):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = user
+        return {'request': request}
+
+    def create_sample(self):
+        """
+        Рецепты с разным числом тегов и ингредиентов, часть —
+        в избранном и списке покупок читателя, подписанного
+        на одного из авторов. Возвращает читателя.
+        """
+        author, reader = (
+            User.objects.create(username=f'{PREFIX}{name}',
+                                email=f'{PREFIX}{name}@example.com')
+            for name in ('author', 'reader')
+        )
+        tags = [
+            Tag.objects.create(name=f'{PREFIX}{number}',
+                               color=f'#00000{number}',
+                               slug=f'{PREFIX}{number}')
+            for number in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(name=f'{PREFIX}{number}',
+                                      measurement_unit='г')
+            for number in range(3)
+        ]
+        for number in range(8):
+            recipe = Recipe.objects.create(
+                author=author if number % 2 else reader,
+                name=f'Рецепт «{number}»', text='Шаг 1\nШаг 2',
+                cooking_time=number + 1, image='recipes/check.png'
+            )
+            recipe.tags.set(tags[:number % 4])
+            recipe.sync_tag_ids(tags[:number % 4])
+            add_ingredients([
+                {'id': ingredient.pk, 'amount': number + 1}
+                for ingredient in ingredients[:number % 3 + 1]
+            ], recipe)
+            if number % 2:
+                Favorite.objects.create(user=reader, recipe=recipe)
+            if number % 3:
+                ShoppingList.objects.create(user=reader, recipe=recipe)
+        Subscription.objects.create(user=reader, author=author)
+        return reader
+
+    def check_outputs(self, limit):
+        with transaction.atomic():
+            reader = self.create_sample()
+            for user in (AnonymousUser(), reader):
+                context = self.get_context(user)
+                for name, queryset, serializer_class, compiled_class in (
+                    self.get_cases(limit)
+                ):
+                    self.compare(name, queryset, serializer_class,
+                                 compiled_class, context)
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS(
+            'Ответы скомпилированных сериализаторов совпадают с DRF.'
+        ))
+
+    def handle(self, *args, **options):
+        if options['check']:
+            return self.check_outputs(options['limit'])
+        user = AnonymousUser()
+        if options['user']:
+            user = User.objects.get(pk=options['user'])
+        context = self.get_context(user)
+
+        for name, queryset, serializer_class, compiled_class in (
+            self.get_cases(options['limit'])
+        ):
+            self.benchmark(name, queryset, serializer_class,
+                           compiled_class, context, options['repeat'])
+
+    def compare(self, name, queryset, serializer_class, compiled_class,
+                context):
+        """
+        Проверяет совпадение ответов стандартного и скомпилированного
+        сериализаторов и возвращает функции, которые их строят.
+        """
+        def default():
+            return JSONRenderer().render(
+                serializer_class(queryset.all(), many=True,
+                                 context=context).data
+            )
+
+        def compiled():
+            rows = compiled_class.get_rows(queryset.all())
+            return ORJSONRenderer().render(
+                compiled_class(rows, context=context).data
+            )
+
+        if default() != compiled():
+            raise CommandError(f'{name}: ответы сериализаторов различаются.')
+        return default, compiled
+
+    def benchmark(self, name, queryset, serializer_class, compiled_class,
+                  context, repeat):
+        default, compiled = self.compare(name, queryset, serializer_class,
+                                         compiled_class, context)
+        default_time = self.measure(default, repeat)
+        compiled_time = self.measure(compiled, repeat)
+        self.stdout.write(
+            f'{name} ({queryset.count()} объектов): '
+            f'DRF {default_time * 1000:.2f} мс, '
+            f'compiled {compiled_time * 1000:.2f} мс, '
+            f'ускорение x{default_time / max(compiled_time, 1e-9):.1f}'
+        )
+
+    def measure(self, func, repeat):
+        start = default_timer()
+        for _ in range(repeat):
+            func()
+        return (default_timer() - start) / repeat
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.catalog import write_catalog_artifacts
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает компактный каталог ингредиентов и его копию .gz '
+        'для отдачи nginx напрямую.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory',
+                            help='Каталог для файлов, по умолчанию '
+                                 'INGREDIENT_CATALOG_ROOT.')
+
+    def handle(self, *args, **options):
+        version = write_catalog_artifacts(options['directory'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Каталог ингредиентов версии {version} собран.'
+        ))
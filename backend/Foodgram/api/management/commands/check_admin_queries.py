@@ -0,0 +1,156 @@
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from Foodgram.deletion import delete_objects
+from jobs.models import Job
+from recipes.models import (Amount, Favorite, Ingredient, MealPlan, Recipe,
+                            ShoppingList, Tag)
+from users.models import Subscription, User
+
+PREFIX = 'check_admin_'
+APPS = ('recipes', 'users', 'jobs')
+
+# Потолки SQL-запросов: страница списка в админке (сессия,
+# пользователь, количество, строки страницы, фильтры) и удаление
+# пользователя со всеми зависимыми таблицами, пока число строк
+# каждой таблицы меньше BATCH_SIZE.
+CHANGELIST_QUERY_CEILING = 6
+DELETE_QUERY_CEILING = 64
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет, что страницы списков админки и каскадное удаление '
+        'пользователя укладываются в постоянное число SQL-запросов '
+        'и оно не растет с числом строк. Данные создаются '
+        'в транзакции, которая откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50,
+                            help='Рецептов у автора в большом наборе.')
+
+    def create_author(self, name, recipes, fans):
+        author = User.objects.create(
+            username=f'{PREFIX}{name}', email=f'{PREFIX}{name}@example.com'
+        )
+        ingredient = Ingredient.objects.create(
+            name=f'{PREFIX}{name}', measurement_unit='г'
+        )
+        tag = Tag.objects.create(
+            name=f'{PREFIX}{name}', color=f'#{author.pk % 0xFFFFFF:06x}',
+            slug=f'{PREFIX}{name}'
+        )
+        Recipe.objects.bulk_create(
+            Recipe(author=author, name=f'Рецепт {number}', text='-',
+                   cooking_time=1, image='recipes/check.png')
+            for number in range(recipes)
+        )
+        recipe_ids = list(author.recipes.values_list('pk', flat=True))
+        Amount.objects.bulk_create(
+            Amount(recipe_id=recipe_id, ingredient=ingredient, amount=1)
+            for recipe_id in recipe_ids
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe_id, tag=tag)
+            for recipe_id in recipe_ids
+        )
+        for model in (Favorite, ShoppingList):
+            model.objects.bulk_create(
+                model(user=fan, recipe_id=recipe_id)
+                for fan in fans for recipe_id in recipe_ids
+            )
+        MealPlan.objects.bulk_create(
+            MealPlan(user=fan, recipe_id=recipe_id, day='2024-01-01')
+            for fan in fans for recipe_id in recipe_ids
+        )
+        Subscription.objects.bulk_create(
+            Subscription(user=fan, author=author) for fan in fans
+        )
+        return author
+
+    def count_queries(self, func):
+        with CaptureQueriesContext(connection) as context:
+            func()
+        return len(context.captured_queries)
+
+    def check_changelists(self, client):
+        failures = []
+        for model, model_admin in admin.site._registry.items():
+            if model._meta.app_label not in APPS:
+                continue
+            url = reverse(
+                f'admin:{model._meta.app_label}_'
+                f'{model._meta.model_name}_changelist'
+            )
+            responses = []
+            queries = self.count_queries(
+                lambda: responses.append(client.get(url))
+            )
+            line = f'GET {url}: {queries}/{CHANGELIST_QUERY_CEILING}'
+            if responses[0].status_code != 200:
+                # Страница с ошибкой не показывает реальное число запросов.
+                line += f' — ответ {responses[0].status_code}'
+                failures.append(line)
+                self.stdout.write(self.style.ERROR(line))
+            elif queries > CHANGELIST_QUERY_CEILING:
+                failures.append(line)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+        return failures
+
+    def check_deletes(self, rows, fans):
+        counts = [
+            self.count_queries(lambda: delete_objects(
+                User.objects.filter(pk=self.create_author(
+                    f'author_{size}', size, fans
+                ).pk)
+            ))
+            for size in (1, rows)
+        ]
+        line = (f'Удаление автора с 1 и {rows} рецептами: '
+                f'{counts[0]} и {counts[1]}/{DELETE_QUERY_CEILING}')
+        if max(counts) > DELETE_QUERY_CEILING or counts[0] != counts[1]:
+            self.stdout.write(self.style.ERROR(line))
+            return [line]
+        self.stdout.write(line)
+        return []
+
+    def handle(self, *args, **options):
+        # Client отправляет запросы на хост testserver.
+        with override_settings(ALLOWED_HOSTS=['testserver']), \
+                transaction.atomic():
+            superuser = User.objects.create_superuser(
+                username=f'{PREFIX}admin',
+                email=f'{PREFIX}admin@example.com',
+                password=None
+            )
+            User.objects.bulk_create(
+                User(username=f'{PREFIX}fan_{number}',
+                     email=f'{PREFIX}fan_{number}@example.com')
+                for number in range(3)
+            )
+            fans = list(User.objects.filter(
+                username__startswith=f'{PREFIX}fan_'
+            ))
+            # Строки для страниц списков: связанные объекты в колонках
+            # должны читаться одним запросом на страницу.
+            self.create_author('list', options['rows'], fans)
+            Job.objects.bulk_create(
+                Job(name='check', user=fan) for fan in fans
+            )
+            client = Client()
+            client.force_login(superuser)
+            failures = (self.check_changelists(client)
+                        + self.check_deletes(options['rows'], fans))
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(
+                'Превышен потолок SQL-запросов:\n' + '\n'.join(failures)
+            )
@@ -0,0 +1,232 @@
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve, reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.urls import router_v1
+from api.utils import add_ingredients
+from Foodgram.query_budget import (QueryBudgetExceeded, duplicated_queries,
+                                   get_query_budget)
+from jobs.models import Job
+from recipes.models import (Favorite, Ingredient, MealPlan, Recipe,
+                            ShoppingList, Tag)
+from users.models import Subscription, User
+
+PREFIX = 'check_query_budgets_'
+EXTRA_URLS = ('api:user_subscriptions', 'api:users-me')
+
+# Для detail-эндпоинтов берется объект, на котором число запросов
+# наибольшее: с самым большим числом вложенных строк.
+WORST_CASE = {
+    Recipe: Count('amounts'),
+}
+
+
+def worst_case_object(queryset):
+    ordering = WORST_CASE.get(queryset.model)
+    if ordering is None:
+        return queryset.first()
+    return queryset.annotate(rows=ordering).order_by('-rows', 'pk').first()
+
+
+def list_filters(user):
+    """
+    Параметры фильтров list-эндпоинтов по basename роутера:
+    проверка значений фильтров и условия добавляют запросы,
+    бюджет должен выдерживать и их.
+    """
+    slugs = list(Tag.objects.order_by('pk').values_list('slug', flat=True))
+    author = User.objects.annotate(
+        rows=Count('recipes')
+    ).order_by('-rows', 'pk').first()
+    return {
+        'recipes': [
+            {'tags': slugs},
+            {'tags_all': slugs},
+            {'author': author.pk},
+            {'is_favorited': 1},
+            {'is_in_shopping_cart': 1},
+            {'is_favorited': 1, 'is_in_shopping_cart': 1, 'tags': slugs},
+        ],
+        'users': [
+            {'search': user.username[:1]},
+            {'cursor': ''},
+        ],
+    }
+
+
+def isolated_caches():
+    """Отдельные LocMem-кеши вместо общих кешей приложения."""
+    return {
+        alias: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': f'check_query_budgets_{alias}',
+        }
+        for alias in settings.CACHES
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет GET-запросы ко всем list- и detail-эндпоинтам API '
+        'и проверяет количество SQL-запросов против бюджета view. '
+        'Запросы, в том числе с фильтрами, выполняются в откатываемой '
+        'транзакции с отдельными кешами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int,
+                            help='id пользователя для авторизованных '
+                                 'запросов, по умолчанию пользователь '
+                                 'с наибольшим числом подписок.')
+        parser.add_argument('--sample', action='store_true',
+                            help='Сначала создать в транзакции авторов, '
+                                 'подписки, рецепты с тегами и '
+                                 'ингредиентами, избранное, список '
+                                 'покупок, план питания и задачи: '
+                                 'проверка на пустой базе в CI.')
+
+    def create_sample(self):
+        """
+        Два автора с рецептами разного состава и читатель,
+        подписанный на обоих, с избранным, списком покупок,
+        планом питания и задачей. Возвращает читателя.
+        """
+        authors = [
+            User.objects.create(username=f'{PREFIX}author_{number}',
+                                email=f'{PREFIX}author_{number}@example.com')
+            for number in range(2)
+        ]
+        reader = User.objects.create(username=f'{PREFIX}reader',
+                                     email=f'{PREFIX}reader@example.com')
+        tags = [
+            Tag.objects.create(name=f'{PREFIX}{number}',
+                               color=f'#00000{number}',
+                               slug=f'{PREFIX}{number}')
+            for number in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(name=f'{PREFIX}{number}',
+                                      measurement_unit='г')
+            for number in range(3)
+        ]
+        for number in range(8):
+            recipe = Recipe.objects.create(
+                author=authors[number % 2], name=f'Рецепт «{number}»',
+                text='Шаг 1\nШаг 2', cooking_time=number + 1,
+                image='recipes/check.png'
+            )
+            recipe.tags.set(tags[:number % 4])
+            recipe.sync_tag_ids(tags[:number % 4])
+            add_ingredients([
+                {'id': ingredient.pk, 'amount': number + 1}
+                for ingredient in ingredients[:number % 3 + 1]
+            ], recipe)
+            if number % 2:
+                Favorite.objects.create(user=reader, recipe=recipe)
+            if number % 3:
+                ShoppingList.objects.create(user=reader, recipe=recipe)
+            MealPlan.objects.create(user=reader, recipe=recipe,
+                                    day='2024-01-01')
+        Subscription.objects.bulk_create(
+            Subscription(user=reader, author=author) for author in authors
+        )
+        Job.objects.create(name='check', user=reader)
+        return reader
+
+    def get_urls(self, user):
+        filters = list_filters(user)
+        for prefix, viewset, basename in router_v1.registry:
+            url = reverse(f'api:{basename}-list')
+            yield url
+            for params in filters.get(basename, ()):
+                yield f'{url}?{urlencode(params, doseq=True)}'
+            queryset = getattr(viewset, 'queryset', None)
+            obj = worst_case_object(queryset) if queryset is not None else None
+            if obj is not None:
+                yield reverse(f'api:{basename}-detail', args=(obj.pk,))
+        for name in EXTRA_URLS:
+            yield reverse(name)
+
+    def get_user(self, options):
+        reader = self.create_sample() if options['sample'] else None
+        if options['user']:
+            return User.objects.get(pk=options['user'])
+        if reader is not None:
+            return reader
+        user = User.objects.annotate(
+            subscriptions=Count('follower')
+        ).order_by('-subscriptions', 'pk').first()
+        if user is None:
+            raise CommandError('Нет пользователя для авторизованных запросов.')
+        return user
+
+    def handle(self, *args, **options):
+        # APIClient отправляет запросы на хост testserver.
+        with override_settings(CACHES=isolated_caches(),
+                               DATABASE_REPLICAS=[],
+                               ALLOWED_HOSTS=['testserver']), \
+                transaction.atomic():
+            user = self.get_user(options)
+            # Фильтры is_favorited и is_in_shopping_cart проверяются
+            # на непустой выборке.
+            recipe = worst_case_object(Recipe.objects.all())
+            if recipe is not None:
+                for model in (Favorite, ShoppingList):
+                    model.objects.get_or_create(user=user, recipe=recipe)
+            failures = self.check_urls(user)
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(
+                'Превышен бюджет SQL-запросов:\n' + '\n'.join(failures)
+            )
+
+    def check_urls(self, user):
+        token, _ = Token.objects.get_or_create(user=user)
+        failures = []
+        for url in self.get_urls(user):
+            clients = (
+                ('anon', APIClient()),
+                ('token', APIClient(HTTP_AUTHORIZATION=f'Token {token}')),
+            )
+            for auth, client in clients:
+                cache.clear()
+                exceeded = False
+                with CaptureQueriesContext(connection) as context:
+                    try:
+                        response = client.get(url)
+                    except QueryBudgetExceeded:
+                        exceeded = True
+                if not exceeded and response.status_code in (401, 403):
+                    continue
+                budget = get_query_budget(
+                    resolve(urlsplit(url).path).func, 'GET'
+                )
+                queries = [query['sql'] for query in context.captured_queries]
+                line = f'GET {url} ({auth}): {len(queries)}/{budget}'
+                if not exceeded and response.status_code != 200:
+                    # Страница с ошибкой не показывает реальное
+                    # число запросов.
+                    line += f' — ответ {response.status_code}'
+                    failures.append(line)
+                    self.stdout.write(self.style.ERROR(line))
+                elif budget is None:
+                    self.stdout.write(self.style.WARNING(
+                        line + ' — бюджет не задан'
+                    ))
+                elif exceeded or len(queries) > budget:
+                    failures.append(line)
+                    self.stdout.write(self.style.ERROR(line))
+                    for sql, count in duplicated_queries(queries):
+                        self.stdout.write(f'    x{count}: {sql}')
+                else:
+                    self.stdout.write(line)
+        return failures
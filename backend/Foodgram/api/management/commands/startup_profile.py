@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+TARGETS = {
+    'wsgi': ('-c', 'import Foodgram.wsgi'),
+    # URLconf и view загружаются воркером на первом запросе.
+    'urls': ('-c', 'import Foodgram.wsgi, Foodgram.urls'),
+    'manage': ('manage.py', 'help'),
+}
+
+
+def parse_importtime(output):
+    """
+    Разбирает вывод python -X importtime:
+    список (модуль, собственное время, накопленное время) в микросекундах.
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def profile_startup(target):
+    """
+    Запускает цель в отдельном интерпретаторе с -X importtime.
+    Возвращает время запуска в миллисекундах и разобранный вывод.
+    """
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'Foodgram.settings')
+    start = time.perf_counter()
+    process = subprocess.run(
+        (sys.executable, '-X', 'importtime', *TARGETS[target]),
+        cwd=settings.BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if process.returncode:
+        raise CommandError(
+            f'{target}: процесс завершился с кодом {process.returncode}.\n'
+            + process.stderr[-2000:]
+        )
+    return wall_ms, parse_importtime(process.stderr)
+
+
+class Command(BaseCommand):
+    help = (
+        'Профиль времени запуска: импорт Foodgram.wsgi, URLconf и manage.py '
+        'в отдельном процессе с python -X importtime. '
+        'С --max-ms завершается ошибкой при превышении порога.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=TARGETS, action='append',
+                            help='Что профилировать, по умолчанию все цели.')
+        parser.add_argument('--top', type=int, default=15,
+                            help='Сколько самых медленных модулей и '
+                                 'пакетов показать.')
+        parser.add_argument('--max-ms', type=float,
+                            help='Порог времени запуска в миллисекундах '
+                                 'для проверки в CI.')
+
+    def handle(self, *args, **options):
+        failed = []
+        for target in options['target'] or TARGETS:
+            wall_ms, modules = profile_startup(target)
+            import_ms = sum(self_us for _, self_us, _ in modules) / 1000
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{target}: запуск {wall_ms:.0f} мс, '
+                f'импорт {import_ms:.0f} мс, модулей {len(modules)}'
+            ))
+
+            packages = defaultdict(int)
+            for name, self_us, _ in modules:
+                packages[name.split('.')[0]] += self_us
+            self.stdout.write('  Пакеты (собственное время):')
+            for package, self_us in sorted(
+                packages.items(), key=lambda item: -item[1]
+            )[:options['top']]:
+                self.stdout.write(f'    {self_us / 1000:8.1f} мс  {package}')
+
+            self.stdout.write('  Модули (накопленное время):')
+            for name, _, cumulative_us in sorted(
+                modules, key=lambda module: -module[2]
+            )[:options['top']]:
+                self.stdout.write(
+                    f'    {cumulative_us / 1000:8.1f} мс  {name}'
+                )
+
+            if options['max_ms'] and wall_ms > options['max_ms']:
+                failed.append(f'{target}: {wall_ms:.0f} мс')
+
+        if failed:
+            raise CommandError(
+                f'Время запуска превышает порог {options["max_ms"]:.0f} мс: '
+                + ', '.join(failed)
+            )
@@ -0,0 +1,155 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    Условные GET-запросы (ETag/Last-Modified) для list и retrieve.
+
+    Перед сериализацией выполняется дешевый агрегирующий запрос
+    (количество, max(pk), max(updated_at)) по отфильтрованному queryset.
+    Если клиент прислал совпадающий If-None-Match, отдается 304
+    без загрузки и сериализации объектов.
+
+    Last-Modified отдается только для retrieve: удаление объекта
+    из списка не сдвигает max(updated_at), и ответ на
+    If-Modified-Since был бы устаревшим. Списки проверяются по ETag,
+    в который входит количество объектов.
+    """
+
+    conditional_actions = ('list', 'retrieve')
+
+    def get_state_queryset(self):
+        """
+        Базовый queryset для агрегатов состояния. Переопределяется,
+        если get_queryset добавляет аннотации, не нужные для агрегатов.
+        """
+        return self.get_queryset()
+
+    def get_conditional_queryset(self):
+        """Queryset, состояние которого определяет ответ."""
+        queryset = self.filter_queryset(self.get_state_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        return queryset
+
+    def get_conditional_aggregates(self):
+        """Агрегаты, изменение которых меняет содержимое ответа."""
+        return {
+            'count': Count('pk'),
+            'last_pk': Max('pk'),
+            'updated_at': Max('updated_at'),
+        }
+
+    def get_user_state(self, user):
+        """
+        Состояние текущего пользователя, от которого зависят
+        персональные поля ответа (is_favorited, is_subscribed и т.д.).
+        """
+        return ()
+
+    def get_conditional_state(self):
+        """Возвращает ETag и Last-Modified для текущего запроса."""
+        state = self.get_conditional_queryset().order_by().aggregate(
+            **self.get_conditional_aggregates()
+        )
+        # Количество строк выборки нужно и пагинации (UserPagination).
+        self.conditional_state = state
+        last_modified = max(
+            (value for value in state.values() if hasattr(value, 'timestamp')),
+            default=None
+        )
+        if getattr(self, 'action', None) != 'retrieve':
+            last_modified = None
+        user = self.request.user
+        user_state = ()
+        if user.is_authenticated:
+            user_state = (user.pk, *self.get_user_state(user))
+            # Персональные поля не отражаются в дате изменения,
+            # поэтому авторизованным отдается только ETag.
+            last_modified = None
+
+        fingerprint = repr((
+            self.request.get_full_path(),
+            sorted(state.items()),
+            user_state,
+        ))
+        etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+        return etag, last_modified
+
+    def patch_conditional_headers(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        if self.request.user.is_authenticated:
+            # Персональное тело почти не повторяется: сжимается
+            # на лету, без копии в общем кеше.
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            # Общий ответ с ETag повторяется, пока не изменятся
+            # данные: сжатое тело кешируется (Foodgram.compression).
+            response.compress_once = True
+            patch_cache_control(response, public=True, max_age=0)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def dispatch_conditional(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_conditional_state()
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        return self.patch_conditional_headers(response, etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        if 'list' not in self.conditional_actions:
+            return super().list(request, *args, **kwargs)
+        return self.dispatch_conditional(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if 'retrieve' not in self.conditional_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self.dispatch_conditional(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class CompiledListMixin:
+    """
+    list через скомпилированный сериализатор (api.compiled).
+    Страница выбирается из queryset строк .values(),
+    экземпляры моделей не создаются.
+    """
+
+    compiled_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.compiled_serializer_class
+        queryset = serializer_class.get_rows(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = serializer_class(
+            page if page is not None else queryset,
+            context=self.get_serializer_context()
+        )
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
@@ -0,0 +1,46 @@
+from functools import partial
+
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from Foodgram.db import EstimatedCountPaginator
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация по id: следующая страница выбирается условием
+    id < последнего id по первичному ключу, без OFFSET и COUNT(*).
+    """
+
+    ordering = '-id'
+
+
+class UserPagination(PageNumberPagination):
+    """
+    Пагинация списка пользователей.
+
+    По умолчанию — номера страниц, как во всем API; количество
+    берется из агрегатов ETag (ConditionalGetMixin), посчитанных
+    по той же выборке без аннотации is_subscribed.
+    С параметром cursor (пустой — первая страница) страницы
+    выбираются по ключу: время ответа не зависит от глубины
+    листания, ссылки next и previous содержат курсор.
+    """
+
+    django_paginator_class = EstimatedCountPaginator
+    cursor_query_param = UserCursorPagination.cursor_query_param
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.cursor_query_param in request.query_params:
+            self.keyset = UserCursorPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        count = getattr(view, 'conditional_state', {}).get('count')
+        self.django_paginator_class = partial(
+            EstimatedCountPaginator, count=count
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
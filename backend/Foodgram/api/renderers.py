@@ -0,0 +1,74 @@
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class RequestTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Слишком большое тело запроса.'
+    default_code = 'request_too_large'
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на основе orjson.
+    Если orjson не установлен, работает как стандартный JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        # Даты и время сериализуются через JSONEncoder DRF,
+        # чтобы формат совпадал со стандартным рендерером.
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=option
+        )
+        return (ret.replace('\u2028'.encode(), b'\\u2028')
+                   .replace('\u2029'.encode(), b'\\u2029'))
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSON-парсер на основе orjson.
+    Если orjson не установлен, работает как стандартный JSONParser.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        # Тело читается не больше лимита: слишком большой запрос
+        # отклоняется до разбора JSON и декодирования картинок.
+        request = (parser_context or {}).get('request')
+        content_length = (
+            request.META.get('CONTENT_LENGTH') if request else None
+        )
+        if (content_length and content_length.isdigit()
+                and int(content_length) > settings.MAX_JSON_BODY_SIZE):
+            raise RequestTooLarge()
+        body = stream.read(settings.MAX_JSON_BODY_SIZE + 1)
+        if len(body) > settings.MAX_JSON_BODY_SIZE:
+            raise RequestTooLarge()
+        if orjson is None:
+            return super().parse(BytesIO(body), media_type, parser_context)
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
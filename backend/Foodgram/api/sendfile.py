@@ -0,0 +1,102 @@
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified, StreamingHttpResponse)
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def content_disposition(filename, as_attachment):
+    disposition = 'attachment' if as_attachment else 'inline'
+    return f"{disposition}; filename*=UTF-8''{quote(filename)}"
+
+
+def iter_range(file, start, length):
+    """Читает из файла length байт начиная со start."""
+    with file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def stream_file(request, name, storage, content_type):
+    """
+    Отдача файла из Python для разработки:
+    Last-Modified, Content-Length и одиночные диапазоны (Range).
+    """
+    modified = int(storage.get_modified_time(name).timestamp())
+    size = storage.size(name)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              modified, size):
+        return HttpResponseNotModified()
+
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', ''))
+    if match and any(match.groups()):
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+        if start > end or start >= size:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        response = StreamingHttpResponse(
+            iter_range(storage.open(name), start, end - start + 1),
+            status=206,
+            content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    else:
+        response = FileResponse(storage.open(name), content_type=content_type)
+        response['Content-Length'] = size
+    response['Last-Modified'] = http_date(modified)
+    return response
+
+
+def send_file(request, name, storage=default_storage, filename=None,
+              as_attachment=False, max_age=None):
+    """
+    Отдает файл из хранилища.
+
+    При SENDFILE_BACKEND = 'nginx' возвращает пустой ответ с заголовком
+    X-Accel-Redirect: файл, его длину и диапазоны отдает nginx,
+    воркер gunicorn освобождается сразу. При 'simple' файл
+    отдается потоком из Python (для разработки).
+    """
+    if not name or not storage.exists(name):
+        raise Http404('Файл не найден.')
+    content_type = (mimetypes.guess_type(name)[0]
+                    or 'application/octet-stream')
+
+    if settings.SENDFILE_BACKEND == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(
+            settings.SENDFILE_URL_PREFIX + name
+        )
+    else:
+        response = stream_file(request, name, storage, content_type)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = content_disposition(
+        filename or name.rsplit('/', 1)[-1], as_attachment
+    )
+    if max_age is None:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=max_age)
+    return response
@@ -1,11 +1,15 @@
+from django.conf import settings
 from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from rest_framework.validators import UniqueTogetherValidator
 
 from api.utils import Base64ImageField, add_ingredients
-from recipes.models import (Amount, Favorite, Ingredient, Recipe, ShoppingList,
-                            Tag)
+from jobs.models import Job
+from recipes.duplicates import check_recipe, save_signatures
+from recipes.models import (Amount, Favorite, Ingredient, MealPlan, Recipe,
+                            ShoppingList, Tag)
 from users.models import Subscription, User
 
 
@@ -39,7 +43,11 @@ class UserSerializerRead(UserSerializer):
         """
         Добавляет в ответ булево поле подписан ли
         текущий юзер на запрощеного пользователя.
+        Если queryset размечен annotate_is_subscribed,
+        значение берется из аннотации без запроса.
         """
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         return (request.user.is_authenticated
                 and Subscription.objects.filter(
@@ -67,6 +75,7 @@ class UserSerializerSubscripe(UserSerializerRead):
         """Добавляет в ответ поле с кратким описанием рецептов Пользователя."""
         request = self.context.get('request')
         recipes_limit = request.query_params.get('recipes_limit')
+        # Если рецепты предзагружены, срез берется из памяти.
         recipes = obj.recipes.all()
 
         if recipes_limit:
@@ -84,6 +93,8 @@ class UserSerializerSubscripe(UserSerializerRead):
 
     def get_recipes_count(self, obj):
         """Добавляет в ответ поле с количеством рецептов Пользователя."""
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.recipes.count()
 
 
@@ -200,16 +211,49 @@ class RecipeSerializerWrite(serializers.ModelSerializer):
 
         return data
 
+    def check_duplicate(self, name, text, ingredients_data, pk=None):
+        """
+        Сигнатура рецепта и его оригинал. В режиме reject похожий
+        рецепт — любой, кроме самого изменяемого, — отклоняет запрос.
+        """
+        reject = settings.RECIPE_DUPLICATES == 'reject'
+        signature, duplicate = check_recipe(
+            name,
+            text,
+            [ingredient['id'] for ingredient in ingredients_data],
+            pk,
+            earlier_only=not reject
+        )
+        if duplicate and reject:
+            raise serializers.ValidationError({
+                'errors': f'Рецепт почти совпадает с рецептом '
+                          f'{duplicate[0]}.'
+            })
+        return signature, duplicate
+
     @transaction.atomic
     def create(self, validated_data):
         """Сохранение Рецепта."""
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
 
+        if settings.RECIPE_DUPLICATES != 'off':
+            signature, duplicate = self.check_duplicate(
+                validated_data['name'],
+                validated_data['text'],
+                ingredients_data
+            )
+
         recipe = Recipe.objects.create(**validated_data)
 
         recipe.tags.set(tags_data)
+        recipe.sync_tag_ids(tags_data)
         add_ingredients(ingredients_data, recipe)
+        if settings.RECIPE_DUPLICATES != 'off':
+            save_signatures(
+                {recipe.pk: signature},
+                {recipe.pk: duplicate} if duplicate else None
+            )
 
         return recipe
 
@@ -220,11 +264,25 @@ class RecipeSerializerWrite(serializers.ModelSerializer):
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
 
+        if settings.RECIPE_DUPLICATES != 'off':
+            signature, duplicate = self.check_duplicate(
+                validated_data.get('name', instance.name),
+                validated_data.get('text', instance.text),
+                ingredients_data,
+                instance.pk
+            )
+
         super().update(instance, validated_data)
 
         instance.tags.set(tags_data)
+        instance.sync_tag_ids(tags_data)
         instance.amounts.all().delete()
         add_ingredients(ingredients_data, instance)
+        if settings.RECIPE_DUPLICATES != 'off':
+            save_signatures(
+                {instance.pk: signature},
+                {instance.pk: duplicate} if duplicate else None
+            )
 
         return instance
 
@@ -252,7 +310,8 @@ class RecipeSerializerRead(serializers.ModelSerializer):
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients',
                   'is_favorited', 'is_in_shopping_cart',
-                  'name', 'image', 'text', 'cooking_time')
+                  'name', 'image', 'text', 'cooking_time',
+                  'calories', 'proteins', 'fats', 'carbohydrates', 'price')
 
     def get_is_favorited(self, obj):
         """
@@ -325,3 +384,71 @@ class ShoppingListSerializer(serializers.ModelSerializer):
             instance.recipe,
             context={'request': request}
         ).data
+
+
+class MealPlanListSerializer(serializers.ListSerializer):
+    """
+    Добавление нескольких записей плана питания одним запросом:
+    рецепты проверяются одним запросом, записи создаются bulk_create.
+    """
+
+    def validate(self, data):
+        recipe_ids = {item['recipe_id'] for item in data}
+        missing = recipe_ids - set(Recipe.objects.filter(
+            pk__in=recipe_ids
+        ).values_list('pk', flat=True))
+        if missing:
+            raise serializers.ValidationError(
+                {'recipe': f'Рецепты не найдены: {sorted(missing)}.'}
+            )
+        return data
+
+    def create(self, validated_data):
+        return MealPlan.objects.bulk_create(
+            MealPlan(**item) for item in validated_data
+        )
+
+
+class MealPlanSerializer(serializers.ModelSerializer):
+    """
+    Serializer модели MealPlan. Принимает одну запись или список,
+    рецепт передается id.
+    """
+
+    recipe = serializers.IntegerField(source='recipe_id')
+
+    class Meta:
+        model = MealPlan
+        fields = ('id', 'day', 'recipe', 'servings')
+        list_serializer_class = MealPlanListSerializer
+
+    def validate_recipe(self, value):
+        """Отдельная запись: список проверяет рецепты целиком."""
+        if self.parent is None and not Recipe.objects.filter(
+            pk=value
+        ).exists():
+            raise serializers.ValidationError('Рецепт не найден.')
+        return value
+
+
+class JobSerializer(serializers.HyperlinkedModelSerializer):
+    """Serializer модели Job для отслеживания статуса фоновой задачи."""
+
+    url = serializers.HyperlinkedIdentityField(view_name='api:jobs-detail')
+    download = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ('id', 'url', 'name', 'status', 'attempts',
+                  'result', 'download', 'created_at', 'updated_at')
+        read_only_fields = fields
+
+    def get_download(self, obj):
+        """Ссылка на файл, сформированный задачей, если он есть."""
+        if not (obj.result or {}).get('file'):
+            return None
+        return reverse(
+            'api:jobs-download',
+            kwargs={'pk': obj.pk},
+            request=self.context.get('request')
+        )
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_token
+from api.events import publish_subscription
+from users.models import Subscription, User
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Сбрасывает кеш токена при выходе пользователя (token/logout)."""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш токенов пользователя при его изменении:
+    смене пароля, деактивации, удалении.
+    """
+    for key in Token.objects.filter(user_id=instance.pk).values_list(
+        'key', flat=True
+    ):
+        invalidate_token(key)
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def publish_subscription_change(sender, instance, **kwargs):
+    """Обновляет подписки открытых потоков событий пользователя."""
+    publish_subscription(instance.user_id, instance.author_id,
+                         active=kwargs['signal'] is post_save)
@@ -0,0 +1,37 @@
+import tempfile
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from api.utils import shopping_cart_text
+from jobs.queue import task
+
+
+@task('export_shopping_cart')
+def export_shopping_cart(job):
+    """Сохраняет файл со списком покупок пользователя задачи."""
+    name = default_storage.save(
+        f'exports/shopping_cart_{job.pk}.txt',
+        ContentFile(shopping_cart_text(job.user).encode())
+    )
+    return {'file': name}
+
+
+@task('export_user_data')
+def export_user_data(job):
+    """
+    Сохраняет архив с данными пользователя задачи.
+    Архив пишется во временный файл по частям и затем
+    копируется в хранилище.
+    """
+    from api.export import export_archive, export_filename
+
+    with tempfile.TemporaryFile() as file:
+        for data in export_archive(job.user):
+            file.write(data)
+        file.seek(0)
+        name = default_storage.save(
+            f'exports/{job.pk}_{export_filename(job.user)}', File(file)
+        )
+    return {'file': name}
@@ -0,0 +1,74 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Ограничение частоты запросов по скользящему окну.
+
+    Вместо списка временных меток (как в SimpleRateThrottle) в кеше
+    хранятся два счетчика — текущего и предыдущего окна, текущий
+    увеличивается атомарным cache.incr. Оценка числа запросов:
+    предыдущее окно с весом оставшейся доли плюс текущее окно.
+
+    Область ограничения берется из throttle_scopes view по action
+    или из throttle_scope. View без области не ограничиваются
+    и не обращаются к кешу.
+
+    Счетчики хранятся в кеше THROTTLE_CACHE. Он должен быть общим
+    для воркеров: с кешем процесса у каждого воркера свое окно,
+    и лимит умножается на число воркеров.
+    """
+
+    def __init__(self):
+        # Частота определяется в allow_request по области view.
+        pass
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE]
+
+    def get_scope(self, view):
+        scopes = getattr(view, 'throttle_scopes', {})
+        return scopes.get(getattr(view, 'action', None),
+                          getattr(view, 'throttle_scope', None))
+
+    def get_cache_key(self, request, view):
+        if request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(view)
+        if self.scope is None:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        key = self.get_cache_key(request, view)
+        self.now = time.time()
+        window = int(self.now // self.duration)
+        current_key = f'{key}:{window}'
+
+        self.cache.add(current_key, 0, self.duration * 2)
+        try:
+            current = self.cache.incr(current_key)
+        except ValueError:
+            # Ключ вытеснен из кеша между add и incr.
+            self.cache.set(current_key, 1, self.duration * 2)
+            current = 1
+        previous = self.cache.get(f'{key}:{window - 1}', 0)
+
+        elapsed = (self.now % self.duration) / self.duration
+        self.estimate = previous * (1 - elapsed) + current
+        return self.estimate <= self.num_requests
+
+    def wait(self):
+        elapsed = self.now % self.duration
+        return math.ceil(self.duration - elapsed)
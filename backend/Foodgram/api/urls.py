@@ -1,8 +1,10 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
-from api.views import (IngredientViewSet, RecipeViewSet, TagViewSet,
-                       UserSubscribeView, UserSubscribtionsListView)
+from api.views import (DiagnosticsView, IngredientViewSet, JobViewSet,
+                       MealPlanViewSet, ProfileDetailView, ProfileListView,
+                       RecipeViewSet, TagViewSet, UserSubscribeView,
+                       UserSubscribtionsListView, UserViewSet)
 
 
 app_name = 'api'
@@ -12,6 +14,9 @@ router_v1 = DefaultRouter()
 router_v1.register('tags', TagViewSet, basename='tags')
 router_v1.register('recipes', RecipeViewSet, basename='recipes')
 router_v1.register('ingredients', IngredientViewSet, basename='ingredients')
+router_v1.register('users', UserViewSet, basename='users')
+router_v1.register('jobs', JobViewSet, basename='jobs')
+router_v1.register('meal_plan', MealPlanViewSet, basename='meal_plan')
 
 
 urlpatterns = [
@@ -25,7 +30,13 @@ urlpatterns = [
         UserSubscribeView.as_view(),
         name='user_subscribe_toggle'
     ),
-    path('', include('djoser.urls')),
+    path('diagnostics/', DiagnosticsView.as_view(), name='diagnostics'),
+    path('profiles/', ProfileListView.as_view(), name='profiles'),
+    re_path(
+        r'^profiles/(?P<profile_id>[0-9]{14}-[0-9]{6})/$',
+        ProfileDetailView.as_view(),
+        name='profile_detail'
+    ),
     path('auth/', include('djoser.urls.authtoken')),
     path('', include(router_v1.urls))
 ]
@@ -1,12 +1,18 @@
 import base64
 
+from django.conf import settings
 from django.core.files.base import ContentFile
+from django.db.models import (BooleanField, Exists, F, FloatField, OuterRef,
+                              Q, Sum, Value)
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import FilterSet, filters
 from rest_framework import serializers, status
 from rest_framework.response import Response
 
-from recipes.models import Amount, Ingredient, Recipe, Tag
+from recipes.models import (Amount, Ingredient, MealPlan, Recipe, ShoppingList,
+                            Tag)
+from recipes.units import NUTRITION_FIELDS, base_amount, base_unit, humanize
+from users.models import Subscription, User
 
 
 class Base64ImageField(serializers.ImageField):
@@ -15,6 +21,11 @@ class Base64ImageField(serializers.ImageField):
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
             format, imgstr = data.split(';base64,')
+            if len(imgstr) * 3 // 4 > settings.MAX_IMAGE_SIZE:
+                raise serializers.ValidationError(
+                    'Размер картинки не должен превышать '
+                    f'{settings.MAX_IMAGE_SIZE // (1024 * 1024)} МБ.'
+                )
             ext = format.split('/')[-1]
             data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
 
@@ -33,17 +44,83 @@ class IngredientFilter(FilterSet):
         fields = ('name', )
 
 
-class RecipeFilter(FilterSet):
+class UserFilter(FilterSet):
+    """
+    Поиск пользователей по началу username, имени или фамилии
+    без учета регистра. Каждое условие обслуживает индекс
+    по UPPER(поле) (users.0003_user_search_indexes).
+    """
+
+    search = filters.CharFilter(method='search_filter')
+
+    class Meta:
+        model = User
+        fields = ('search', )
+
+    def search_filter(self, queryset, name, value):
+        return queryset.filter(
+            Q(username__istartswith=value)
+            | Q(first_name__istartswith=value)
+            | Q(last_name__istartswith=value)
+        )
+
+
+def annotate_is_subscribed(queryset, user):
+    """
+    Поле is_subscribed пользователей queryset для user: EXISTS
+    в том же запросе вместо отдельного запроса на каждую строку.
+    """
+    if not user.is_authenticated:
+        return queryset.annotate(
+            is_subscribed=Value(False, output_field=BooleanField())
+        )
+    return queryset.annotate(is_subscribed=Exists(
+        Subscription.objects.filter(user=user, author=OuterRef('pk'))
+    ))
+
+
+class RequestCachedFilterSet(FilterSet):
+    """
+    Форма фильтров проверяется один раз за запрос.
+    ConditionalGetMixin фильтрует выборку дважды — для ETag
+    и для страницы, а проверка значений ModelChoiceFilter
+    (теги по slug, автор) — запрос к БД.
+    """
+
+    @property
+    def form(self):
+        if not hasattr(self, '_form') and self.request is not None:
+            forms = self.request.__dict__.setdefault('filterset_forms', {})
+            key = (type(self), self.form_prefix)
+            if key not in forms:
+                forms[key] = super().form
+            self._form = forms[key]
+        return super().form
+
+
+class RecipeFilter(RequestCachedFilterSet):
     """
     Поиск по полям tags и author.
     Добавлят возможность фильровать по избранным
     и добавленным в корзину рецептам.
     Используется в Recipe преставлении.
+
+    Теги фильтруются по Recipe.tag_ids: tags — хотя бы один из тегов
+    (&&), tags_all — все теги (@>). Оба условия обслуживает GIN-индекс,
+    без JOIN по tags и DISTINCT.
+
+    calories_min/calories_max и price_min/price_max — диапазоны
+    по заранее рассчитанным индексированным колонкам Recipe.
     """
 
-    tags = filters.ModelMultipleChoiceFilter(field_name='tags__slug',
-                                             to_field_name='slug',
-                                             queryset=Tag.objects.all())
+    tags = filters.ModelMultipleChoiceFilter(to_field_name='slug',
+                                             queryset=Tag.objects.all(),
+                                             method='tags_filter')
+    tags_all = filters.ModelMultipleChoiceFilter(to_field_name='slug',
+                                                 queryset=Tag.objects.all(),
+                                                 method='tags_all_filter')
+    calories = filters.RangeFilter()
+    price = filters.RangeFilter()
     is_favorited = filters.BooleanFilter(
         method='is_favorited_filter')
     is_in_shopping_cart = filters.BooleanFilter(
@@ -53,6 +130,16 @@ class RecipeFilter(FilterSet):
         model = Recipe
         fields = ('tags', 'author',)
 
+    def tags_filter(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(tag_ids__overlap=[tag.pk for tag in value])
+
+    def tags_all_filter(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(tag_ids__contains=[tag.pk for tag in value])
+
     def is_favorited_filter(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
@@ -107,3 +194,112 @@ def add_ingredients(ingredients_data, recipe):
             )
         )
     Amount.objects.bulk_create(ingredients)
+    recipe.sync_totals()
+
+
+def aggregate_ingredients(amounts, scale=None):
+    """
+    Вспомогательная функция для суммирования ингредиентов.
+    Количества переводятся в базовую единицу измерения
+    и суммируются одним SQL-запросом, затем переводятся
+    в удобную для чтения единицу.
+    scale — выражение множителя количества для каждой строки.
+    """
+
+    amount = base_amount()
+    if scale is not None:
+        amount = amount * scale
+    totals = amounts.annotate(
+        unit=base_unit()
+    ).values(
+        'ingredient__name', 'unit'
+    ).annotate(
+        total=Sum(amount, output_field=FloatField())
+    ).order_by('ingredient__name', 'unit')
+
+    ingredients = []
+    for row in totals:
+        amount, unit = humanize(row['total'], row['unit'])
+        ingredients.append({
+            'name': row['ingredient__name'],
+            'amount': amount,
+            'measurement_unit': unit
+        })
+    return ingredients
+
+
+def shopping_cart_ingredients(user):
+    """Суммарный список ингредиентов из списка покупок пользователя."""
+    return aggregate_ingredients(
+        Amount.objects.filter(recipe__shopping_list__user=user)
+    )
+
+
+def meal_plan_ingredients(plans):
+    """
+    Суммарный список ингредиентов плана питания с учетом порций.
+    Рецепт, запланированный несколько раз, учитывается каждый раз.
+    """
+    return aggregate_ingredients(
+        Amount.objects.filter(recipe__meal_plans__in=plans),
+        scale=F('recipe__meal_plans__servings')
+    )
+
+
+def fill_shopping_cart(user, plans):
+    """
+    Добавляет рецепты плана питания в список покупок пользователя
+    одной вставкой. Возвращает количество добавленных рецептов.
+    """
+    recipe_ids = set(plans.values_list('recipe_id', flat=True))
+    recipe_ids -= set(ShoppingList.objects.filter(
+        user=user,
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', flat=True))
+    ShoppingList.objects.bulk_create(
+        [ShoppingList(user=user, recipe_id=pk) for pk in recipe_ids],
+        ignore_conflicts=True
+    )
+    return len(recipe_ids)
+
+
+class MealPlanFilter(FilterSet):
+    """Фильтр плана питания по диапазону дней: start и end включительно."""
+
+    start = filters.DateFilter(field_name='day', lookup_expr='gte')
+    end = filters.DateFilter(field_name='day', lookup_expr='lte')
+
+    class Meta:
+        model = MealPlan
+        fields = ('start', 'end')
+
+
+def shopping_cart_totals(user):
+    """
+    Пищевая ценность и стоимость списка покупок пользователя:
+    сумма заранее рассчитанных итогов рецептов.
+    """
+    totals = Recipe.objects.filter(shopping_list__user=user).aggregate(**{
+        field: Sum(field) for field in NUTRITION_FIELDS
+    })
+    return {
+        field: round(value or 0.0, 2) for field, value in totals.items()
+    }
+
+
+def shopping_cart_text(user):
+    """
+    Вспомогательная функция для формирования текста списка покупок
+    с суммированием одинаковых ингредиентов.
+    """
+
+    shopping_res_list = ['Список покупок:\n']
+    for ingridient in shopping_cart_ingredients(user):
+        shopping_res_list.append(
+            '\n{} - {} {}'.format(
+                ingridient['name'],
+                ingridient['amount'],
+                ingridient['measurement_unit']
+            )
+        )
+    return ''.join(shopping_res_list)
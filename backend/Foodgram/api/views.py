@@ -1,34 +1,194 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+import os
+
+from django.conf import settings
+from django.db.models import (Count, IntegerField, Max, OuterRef, Prefetch,
+                              Subquery)
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
+from djoser.views import UserViewSet as DjoserUserViewSet
 from rest_framework import generics, mixins, status, views, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from api.catalog import build_delta, catalog_version, get_catalog
+from api.compiled import (IngredientValuesSerializer, RecipeValuesSerializer,
+                          TagValuesSerializer)
+from api.events import EVENTS_PATH, issue_ticket, publish_recipe
+from api.mixins import CompiledListMixin, ConditionalGetMixin
+from api.pagination import UserPagination
 from api.permissions import IsAdminOrAuthorOrReadOnly
+from api.sendfile import content_disposition, send_file
 from api.serializers import (FavoriteSerializer, IngredientSerializer,
+                             JobSerializer, MealPlanSerializer,
+                             RecipeSerializerBrief,
                              RecipeSerializerRead, RecipeSerializerWrite,
                              ShoppingListSerializer, SubscripeSerializer,
                              TagSerializer, UserSerializerSubscripe)
-from api.utils import IngredientFilter, RecipeFilter, recipe_add_or_del
-from recipes.models import (Amount, Favorite, Ingredient, Recipe, ShoppingList,
-                            Tag)
+from api.utils import (IngredientFilter, MealPlanFilter, RecipeFilter,
+                       UserFilter, annotate_is_subscribed, fill_shopping_cart,
+                       meal_plan_ingredients, recipe_add_or_del,
+                       shopping_cart_ingredients, shopping_cart_text,
+                       shopping_cart_totals)
+from Foodgram.health import diagnostics
+from Foodgram.profiling import list_profiles, profile_path
+from jobs.models import Job
+from jobs.queue import enqueue
+from recipes.models import (Amount, Favorite, Ingredient, MealPlan, Recipe,
+                            ShoppingList, SimilarRecipe, Tag)
 from users.models import Subscription, User
 
 
-class UserSubscribtionsListView(generics.ListAPIView):
+def subscriptions_state(user):
+    """Состояние подписок пользователя для поля is_subscribed."""
+    return tuple(Subscription.objects.filter(user=user).aggregate(
+        count=Count('pk'),
+        last_pk=Max('pk')
+    ).values())
+
+
+class UserViewSet(ConditionalGetMixin, DjoserUserViewSet):
+    """
+    ViewSet модели User с поддержкой условных GET-запросов.
+
+    В list и retrieve поле is_subscribed вычисляется в запросе
+    страницы (EXISTS), список поддерживает поиск по началу
+    username/имени/фамилии (search) и keyset-пагинацию (cursor).
+    """
+
+    query_budget = {
+        'list': 4, 'retrieve': 4, 'me': 4, 'export': 3, 'events_ticket': 1
+    }
+    throttle_scopes = {'export': 'export'}
+    filter_backends = (DjangoFilterBackend, )
+    filterset_class = UserFilter
+    pagination_class = UserPagination
+
+    def get_permissions(self):
+        if self.action == 'me':
+            return (IsAuthenticated(), )
+        return super().get_permissions()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            return annotate_is_subscribed(queryset, self.request.user)
+        return queryset
+
+    def get_state_queryset(self):
+        # Агрегаты ETag считаются без EXISTS по каждой строке.
+        return super().get_queryset()
+
+    def get_conditional_queryset(self):
+        if self.action == 'me':
+            return User.objects.filter(pk=self.request.user.pk)
+        return super().get_conditional_queryset()
+
+    def get_user_state(self, user):
+        return subscriptions_state(user)
+
+    @action(
+        detail=False,
+        methods=['get', 'post'],
+        url_path='me/export',
+        permission_classes=(IsAuthenticated, )
+    )
+    def export(self, request):
+        """
+        Выгрузка данных пользователя архивом ZIP: рецепты, избранное,
+        список покупок, подписки и картинки рецептов.
+        GET отдает архив потоком, POST формирует его в фоновой задаче,
+        файл доступен по ссылке на скачивание задачи.
+        """
+        if request.method == 'POST':
+            job = enqueue('export_user_data', user=request.user)
+            serializer = JobSerializer(job, context={'request': request})
+            return Response(
+                serializer.data,
+                status=status.HTTP_202_ACCEPTED,
+                headers={'Location': serializer.data['url']}
+            )
+        # Выгрузка нужна редко: модуль архива (zipfile, json)
+        # не загружается при запуске воркера.
+        from api.export import export_archive, export_filename
+
+        response = StreamingHttpResponse(
+            export_archive(request.user),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = content_disposition(
+            export_filename(request.user), as_attachment=True
+        )
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='me/events_ticket',
+        permission_classes=(IsAuthenticated, )
+    )
+    def events_ticket(self, request):
+        """
+        Билет для подключения к потоку событий
+        из браузера: GET /api/events/?ticket=<билет>.
+        """
+        ticket = issue_ticket(request.user)
+        return Response({
+            'ticket': ticket,
+            'url': f'{EVENTS_PATH}?ticket={ticket}',
+            'expires_in': settings.EVENTS_TICKET_MAX_AGE,
+        }, status=status.HTTP_201_CREATED)
+
+
+class UserSubscribtionsListView(ConditionalGetMixin, generics.ListAPIView):
     """View для получения списка подписок."""
 
     serializer_class = UserSerializerSubscripe
+    query_budget = {'get': 6}
+    throttle_scope = 'subscriptions'
 
-    def get_queryset(self):
+    def get_state_queryset(self):
         subscriptions = Subscription.objects.filter(user=self.request.user)
         subscribed_users = subscriptions.values_list('author', flat=True)
         authors = User.objects.filter(pk__in=subscribed_users)
         return authors
 
+    def get_queryset(self):
+        """
+        Авторы с is_subscribed и recipes_count в запросе страницы,
+        рецепты страницы — одним дополнительным запросом.
+        """
+        recipes = Recipe.objects.filter(
+            author=OuterRef('pk')
+        ).order_by().values('author').annotate(
+            count=Count('pk')
+        ).values('count')
+        return annotate_is_subscribed(
+            self.get_state_queryset(), self.request.user
+        ).annotate(
+            recipes_count=Coalesce(
+                Subquery(recipes, output_field=IntegerField()), 0
+            )
+        ).prefetch_related(Prefetch(
+            'recipes',
+            queryset=Recipe.objects.only(
+                'id', 'author_id', 'name', 'image', 'cooking_time'
+            )
+        ))
+
+    def get_conditional_aggregates(self):
+        return {
+            **super().get_conditional_aggregates(),
+            'recipes_count': Count('recipes'),
+            'recipes_last_pk': Max('recipes__pk'),
+            'recipes_updated_at': Max('recipes__updated_at'),
+        }
+
 
 class UserSubscribeView(views.APIView):
     """View для создания и удаления подписок."""
@@ -58,7 +218,130 @@ class UserSubscribeView(views.APIView):
         )
 
 
+class DiagnosticsView(views.APIView):
+    """
+    View диагностики для персонала: соединения с БД, кеши,
+    очередь фоновых задач и оценки размеров таблиц.
+    """
+
+    permission_classes = (IsAdminUser, )
+
+    def get(self, request):
+        return Response(diagnostics())
+
+
+class ProfileListView(views.APIView):
+    """View для получения списка сохраненных профилей запросов."""
+
+    permission_classes = (IsAdminUser, )
+
+    def get(self, request):
+        return Response(list_profiles())
+
+
+class ProfileDetailView(views.APIView):
+    """
+    View профиля запроса: метаданные и SQL-запросы,
+    с output=folded — стеки для построения flamegraph.
+    """
+
+    permission_classes = (IsAdminUser, )
+
+    def get(self, request, profile_id):
+        extension = 'json'
+        if request.query_params.get('output') == 'folded':
+            extension = 'folded'
+        path = profile_path(profile_id, extension)
+        if not os.path.exists(path):
+            raise Http404('Профиль не найден.')
+        with open(path, 'rb') as file:
+            content = file.read()
+        if extension == 'json':
+            return HttpResponse(content, content_type='application/json')
+        response = HttpResponse(content, content_type='text/plain')
+        response['Content-Disposition'] = (
+            f'attachment; filename="{profile_id}.folded"'
+        )
+        return response
+
+
+class JobViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet
+):
+    """ViewSet фоновых задач текущего пользователя."""
+
+    serializer_class = JobSerializer
+    query_budget = {'list': 3, 'retrieve': 2, 'download': 2}
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user)
+
+    @action(detail=True, methods=['get', ])
+    def download(self, request, pk):
+        """Скачивание файла, сформированного задачей."""
+        job = self.get_object()
+        return send_file(
+            request,
+            (job.result or {}).get('file'),
+            as_attachment=True
+        )
+
+
+class MealPlanViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet плана питания текущего пользователя.
+    POST принимает одну запись или список: неделя планируется
+    одним запросом. Параметры start и end ограничивают дни.
+    """
+
+    serializer_class = MealPlanSerializer
+    permission_classes = (IsAuthenticated, )
+    pagination_class = None
+    http_method_names = ['get', 'post', 'patch', 'delete']
+    filter_backends = (DjangoFilterBackend, )
+    filterset_class = MealPlanFilter
+    query_budget = {
+        'list': 2,
+        'create': 3,
+        'retrieve': 2,
+        'partial_update': 3,
+        'destroy': 3,
+        'ingredients': 2,
+        'shopping_cart': 4,
+    }
+
+    def get_queryset(self):
+        return MealPlan.objects.filter(user=self.request.user)
+
+    def get_serializer(self, *args, **kwargs):
+        if isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=['get', ])
+    def ingredients(self, request):
+        """
+        Суммарный список ингредиентов плана с учетом порций:
+        один группирующий SQL-запрос на любое число записей.
+        """
+        plans = self.filter_queryset(self.get_queryset())
+        return Response(meal_plan_ingredients(plans))
+
+    @action(detail=False, methods=['post', ])
+    def shopping_cart(self, request):
+        """Добавляет рецепты плана в список покупок одной вставкой."""
+        plans = self.filter_queryset(self.get_queryset())
+        added = fill_shopping_cart(request.user, plans)
+        return Response({'added': added}, status=status.HTTP_201_CREATED)
+
+
 class TagViewSet(
+    CompiledListMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     viewsets.GenericViewSet
@@ -67,11 +350,14 @@ class TagViewSet(
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    compiled_serializer_class = TagValuesSerializer
+    query_budget = 2
     pagination_class = None
     permission_classes = (AllowAny, )
 
 
 class IngredientViewSet(
+    CompiledListMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     viewsets.GenericViewSet
@@ -80,25 +366,154 @@ class IngredientViewSet(
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+    compiled_serializer_class = IngredientValuesSerializer
+    query_budget = {'list': 2, 'retrieve': 2, 'catalog': 4}
     pagination_class = None
     permission_classes = (AllowAny, )
 
     filter_backends = (DjangoFilterBackend, )
     filterset_class = IngredientFilter
 
+    @action(detail=False, methods=['get', ])
+    def catalog(self, request):
+        """
+        Компактный каталог ингредиентов в колоночном формате.
+        С параметром since=<версия> возвращает только изменения
+        и id удаленных ингредиентов после указанной версии.
+        """
+        version = catalog_version()
+        since = request.query_params.get('since', '0')
+        if not since.isdigit() or int(since) > version:
+            return Response(
+                {'errors': 'since должен быть целым числом '
+                           f'от 0 до {version}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        since = int(since)
+
+        etag = quote_etag(f'ingredients-{since}-{version}')
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            if since:
+                content = build_delta(since, version)
+            else:
+                content = get_catalog(version)
+            response = HttpResponse(content, content_type='application/json')
+            response.compress_once = True
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
+
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    ConditionalGetMixin,
+    CompiledListMixin,
+    viewsets.ModelViewSet
+):
     """ViewSet модели Recipe."""
 
     queryset = Recipe.objects.all()
+    compiled_serializer_class = RecipeValuesSerializer
+    query_budget = {
+        'list': 14,
+        'retrieve': 11,
+        'image': 2,
+        'similar': 2,
+        'download_shopping_cart': 2,
+        'shopping_cart_ingredients': 2,
+        'shopping_cart_totals': 2,
+    }
+    throttle_scopes = {
+        'create': 'recipe_write',
+        'partial_update': 'recipe_write',
+        'download_shopping_cart': 'shopping_cart',
+        'shopping_cart_ingredients': 'shopping_cart',
+        'shopping_cart_totals': 'shopping_cart',
+        'export_shopping_cart': 'shopping_cart',
+    }
     permission_classes = (IsAdminOrAuthorOrReadOnly, )
     http_method_names = ['get', 'post', 'patch', 'delete']
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            # Автор, теги и ингредиенты — тремя запросами
+            # при любом числе ингредиентов.
+            return queryset.select_related('author').prefetch_related(
+                'tags',
+                Prefetch(
+                    'amounts',
+                    queryset=Amount.objects.select_related('ingredient')
+                )
+            )
+        return queryset
+
+    def get_state_queryset(self):
+        return super().get_queryset()
+
+    def get_conditional_aggregates(self):
+        return {
+            **super().get_conditional_aggregates(),
+            'author_updated_at': Max('author__updated_at'),
+        }
+
+    def get_user_state(self, user):
+        """Состояние избранного и списка покупок текущего пользователя."""
+        return (
+            *Favorite.objects.filter(user=user).aggregate(
+                count=Count('pk'), last_pk=Max('pk')
+            ).values(),
+            *ShoppingList.objects.filter(user=user).aggregate(
+                count=Count('pk'), last_pk=Max('pk')
+            ).values(),
+            *subscriptions_state(user),
+        )
+
+    @action(
+        detail=True,
+        methods=['get', ],
+        permission_classes=(AllowAny, )
+    )
+    def image(self, request, pk):
+        """Отдача картинки Рецепта через X-Accel-Redirect."""
+        recipe = self.get_object()
+        return send_file(
+            request,
+            recipe.image.name,
+            storage=recipe.image.storage,
+            max_age=settings.MEDIA_CACHE_MAX_AGE
+        )
+
+    @action(
+        detail=True,
+        methods=['get', ],
+        permission_classes=(AllowAny, )
+    )
+    def similar(self, request, pk):
+        """
+        Похожие рецепты: соседи, заранее рассчитанные командой
+        build_recommendations. Одно чтение по индексу (recipe, -score).
+        """
+        if not pk.isdigit():
+            raise Http404('Рецепт не найден.')
+        recipes = [
+            item.similar for item in SimilarRecipe.objects.filter(
+                recipe_id=pk
+            ).select_related('similar')
+        ]
+        serializer = RecipeSerializerBrief(
+            recipes,
+            many=True,
+            context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
     def perform_create(self, serializer):
         """Сохранение автора отзыва при создании Рецепта."""
         serializer.save(author=self.request.user)
+        publish_recipe(serializer.instance)
 
     def get_serializer_class(self):
         """Выбор сериалайзера для чтения или записи."""
@@ -136,24 +551,49 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     def download_shopping_cart(self, request):
         """Работа с списком покупок. Отправка файла со списком покупок."""
-        ingredients = Amount.objects.filter(
-            recipe__shopping_list__user=request.user
-        ).values(
-            'ingredient__name', 'ingredient__measurement_unit'
-        ).annotate(
-            ingredient__amount=Sum('amount')
-        )
-
-        shopping_res_list = ['Список покупок:\n']
-        for ingridient in ingredients:
-            shopping_res_list.append(
-                '\n{} - {} {}'.format(
-                    ingridient['ingredient__name'],
-                    ingridient['ingredient__amount'],
-                    ingridient['ingredient__measurement_unit']
-                )
-            )
-
-        response = HttpResponse(shopping_res_list, content_type='text/plain')
+        response = HttpResponse(shopping_cart_text(request.user),
+                                content_type='text/plain')
         response['Content-Disposition'] = 'attachment; filename="data.txt"'
         return response
+
+    @action(
+        detail=False,
+        methods=['get', ],
+        permission_classes=(IsAuthenticated, )
+    )
+    def shopping_cart_ingredients(self, request):
+        """
+        Работа с списком покупок. Суммарный список ингредиентов
+        с приведением к общим единицам измерения.
+        """
+        return Response(shopping_cart_ingredients(request.user))
+
+    @action(
+        detail=False,
+        methods=['get', ],
+        permission_classes=(IsAuthenticated, )
+    )
+    def shopping_cart_totals(self, request):
+        """
+        Работа с списком покупок. Суммарная пищевая ценность
+        и стоимость рецептов из списка покупок.
+        """
+        return Response(shopping_cart_totals(request.user))
+
+    @action(
+        detail=False,
+        methods=['post', ],
+        permission_classes=(IsAuthenticated, )
+    )
+    def export_shopping_cart(self, request):
+        """
+        Формирование файла со списком покупок в фоновой задаче.
+        Статус и ссылка на файл доступны по адресу задачи.
+        """
+        job = enqueue('export_shopping_cart', user=request.user)
+        serializer = JobSerializer(job, context={'request': request})
+        return Response(
+            serializer.data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': serializer.data['url']}
+        )
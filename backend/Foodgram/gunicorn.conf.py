@@ -0,0 +1,37 @@
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+workers = int(os.getenv(
+    'GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1
+))
+# gthread — синхронный Django с пулом потоков в каждом воркере;
+# для ASGI: uvicorn.workers.UvicornWorker и Foodgram.asgi:application.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Перезапуск воркеров после max_requests запросов (с разбросом,
+# чтобы воркеры не перезапускались одновременно).
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+# Соединения от nginx переиспользуются, keepalive больше интервала nginx.
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Heartbeat-файлы воркеров в памяти, а не на overlay-диске контейнера.
+worker_tmp_dir = os.getenv('GUNICORN_WORKER_TMP_DIR', '/dev/shm')
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+
+
+def when_ready(server):
+    """Прогрев приложения в мастер-процессе перед запуском воркеров."""
+    if preload_app:
+        from Foodgram.warmup import warmup
+        warmup()
@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'priority', 'attempts',
+                    'run_at', 'user')
+    list_select_related = ('user', )
+    list_filter = ('status', 'name')
+    search_fields = ('name',)
+    raw_id_fields = ('user',)
+    readonly_fields = ('created_at', 'updated_at')
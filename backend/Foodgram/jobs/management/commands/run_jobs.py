@@ -0,0 +1,53 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.queue import (HEARTBEAT_INTERVAL, claim_job, requeue_stale_jobs,
+                        run_job)
+
+
+class Command(BaseCommand):
+    help = 'Запускает воркер очереди фоновых задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Пауза при пустой очереди, в секундах.')
+        parser.add_argument('--stale-timeout', type=int,
+                            default=6 * HEARTBEAT_INTERVAL,
+                            help='Через сколько секунд без сигнала '
+                                 'воркера задача в статусе running '
+                                 'считается зависшей.')
+        parser.add_argument('--burst', action='store_true',
+                            help='Выполнить все задачи в очереди и выйти.')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        checked_at = 0
+        while not self.stopping:
+            close_old_connections()
+            # Зависшие задачи ищутся не только при запуске: воркер
+            # может упасть, пока остальные работают.
+            if time.monotonic() - checked_at >= HEARTBEAT_INTERVAL:
+                checked_at = time.monotonic()
+                requeued = requeue_stale_jobs(options['stale_timeout'])
+                if requeued:
+                    self.stdout.write(
+                        f'Возвращено в очередь задач: {requeued}'
+                    )
+            job = claim_job()
+            if job is None:
+                if options['burst']:
+                    break
+                time.sleep(options['interval'])
+                continue
+            job = run_job(job)
+            self.stdout.write(f'{job.name} #{job.pk}: {job.status}')
+
+    def stop(self, signum, frame):
+        """Завершает работу после текущей задачи."""
+        self.stopping = True
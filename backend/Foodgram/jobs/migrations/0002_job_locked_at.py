@@ -0,0 +1,27 @@
+# Generated by Django 3.2 on 2026-10-19 09:32
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def lock_running_jobs(apps, schema_editor):
+    # Задачи, запущенные до появления отметки, проверяются
+    # по времени последнего изменения.
+    Job = apps.get_model('jobs', 'Job')
+    Job.objects.filter(status='running').update(locked_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='locked_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последний сигнал воркера'),
+        ),
+        migrations.RunPython(lock_running_jobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+from django.db import models
+from django.utils import timezone
+
+from users.models import User
+
+LETTER_LIMIT = 30
+
+
+class Job(models.Model):
+    """Модель фоновой задачи."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Название задачи', max_length=100)
+    payload = models.JSONField('Параметры', default=dict, blank=True)
+    result = models.JSONField('Результат', null=True, blank=True)
+    error = models.TextField('Ошибка', blank=True)
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING
+    )
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток',
+        default=3
+    )
+    run_at = models.DateTimeField('Запустить после', default=timezone.now)
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        related_name='jobs',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
+    locked_at = models.DateTimeField(
+        'Последний сигнал воркера',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_at'],
+                name='job_queue_idx'
+            ),
+        ]
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'[:LETTER_LIMIT]
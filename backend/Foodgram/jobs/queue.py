@@ -0,0 +1,139 @@
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+RETRY_DELAY = 10
+HEARTBEAT_INTERVAL = 10
+
+
+def task(name):
+    """
+    Регистрирует функцию как фоновую задачу.
+    Функция принимает экземпляр Job и возвращает JSON-совместимый результат.
+    Модули tasks.py приложений импортируются автоматически.
+    """
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, user=None, priority=0, max_attempts=3, **payload):
+    """Ставит задачу в очередь."""
+    if name not in TASKS:
+        raise KeyError(f'Неизвестная задача: {name}')
+    return Job.objects.create(
+        name=name,
+        user=user,
+        priority=priority,
+        max_attempts=max_attempts,
+        payload=payload
+    )
+
+
+def claim_job():
+    """
+    Забирает из очереди задачу с наибольшим приоритетом.
+    Строки, заблокированные другими воркерами, пропускаются
+    (SELECT ... FOR UPDATE SKIP LOCKED).
+    """
+    with transaction.atomic():
+        job = Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.PENDING,
+            run_at__lte=timezone.now()
+        ).order_by('-priority', 'run_at', 'pk').first()
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.locked_at = timezone.now()
+        job.save(update_fields=('status', 'attempts', 'locked_at',
+                                'updated_at'))
+    return job
+
+
+class Heartbeat(threading.Thread):
+    """
+    Пока задача выполняется, раз в interval секунд обновляет
+    Job.locked_at. По возрасту отметки requeue_stale_jobs отличает
+    задачи упавшего воркера от долгих задач живого.
+    """
+
+    def __init__(self, job, interval=HEARTBEAT_INTERVAL):
+        super().__init__(daemon=True)
+        self.job_id = job.pk
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                Job.objects.filter(
+                    pk=self.job_id, status=Job.RUNNING
+                ).update(locked_at=timezone.now())
+        finally:
+            # Соединение потока с БД не закрывается Django само.
+            connection.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.join()
+
+
+def run_job(job):
+    """Выполняет задачу. При ошибке планирует повтор с задержкой."""
+    try:
+        with Heartbeat(job):
+            job.result = TASKS[job.name](job)
+    except Exception:
+        job.error = traceback.format_exc()
+        logger.exception('Задача %s #%s завершилась ошибкой.',
+                         job.name, job.pk)
+        if job.attempts < job.max_attempts:
+            job.status = Job.PENDING
+            job.run_at = timezone.now() + timedelta(
+                seconds=RETRY_DELAY * 2 ** (job.attempts - 1)
+            )
+        else:
+            job.status = Job.FAILED
+    else:
+        job.status = Job.DONE
+        job.error = ''
+    job.save(update_fields=('status', 'result', 'error',
+                            'run_at', 'updated_at'))
+    return job
+
+
+def requeue_stale_jobs(timeout):
+    """
+    Возвращает в очередь задачи в статусе running, от воркера которых
+    нет сигнала дольше timeout секунд (воркер упал или завис).
+    Долгие задачи живых воркеров не трогаются: их отметка locked_at
+    обновляется каждые HEARTBEAT_INTERVAL секунд.
+    """
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(seconds=timeout)
+    )
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED,
+        error='Воркер перестал отвечать.',
+        locked_at=None,
+        updated_at=timezone.now()
+    )
+    return stale.update(status=Job.PENDING, locked_at=None,
+                        updated_at=timezone.now())
@@ -0,0 +1,20 @@
+from django.apps import apps
+
+from Foodgram.deletion import delete_objects
+from jobs.queue import task
+
+
+@task('delete_objects')
+def delete_objects_task(job):
+    """
+    Удаляет объекты со всеми зависимыми строками.
+    Прогресс по моделям сохраняется в результат задачи после каждого пакета.
+    """
+    model = apps.get_model(job.payload['model'])
+    queryset = model._base_manager.filter(pk__in=job.payload['pks'])
+
+    def progress(deleted):
+        job.result = {'deleted': dict(deleted)}
+        job.save(update_fields=('result', 'updated_at'))
+
+    return {'deleted': dict(delete_objects(queryset, progress=progress))}
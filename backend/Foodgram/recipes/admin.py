@@ -1,15 +1,21 @@
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
-from recipes.models import (Amount, Favorite, Ingredient, Recipe, ShoppingList,
-                            Tag)
+from Foodgram.db import EstimatedCountPaginator
+from Foodgram.deletion import CascadeDeleteAdminMixin
+from recipes.models import (Amount, Favorite, Ingredient, MealPlan, Recipe,
+                            RecipeSignature, ShoppingList, Tag)
 
 admin.site.empty_value_display = '-пусто-'
 
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'measurement_unit')
+    list_display = ('id', 'name', 'measurement_unit', 'calories', 'price')
     search_fields = ('name',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Tag)
@@ -20,38 +26,111 @@ class TagAdmin(admin.ModelAdmin):
 
 class RecipeIngredientInline(admin.TabularInline):
     model = Amount
+    autocomplete_fields = ('ingredient',)
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(CascadeDeleteAdminMixin, admin.ModelAdmin):
     list_display = (
         'id',
         'name',
         'author',
+        'calories',
+        'price',
         'favorites_count',
     )
-    search_fields = ('name', 'tags', 'author')
+    list_select_related = ('author',)
+    search_fields = ('name', 'tags__name', 'author__username')
+    autocomplete_fields = ('author', 'tags')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     inlines = [
         RecipeIngredientInline,
     ]
 
+    def get_queryset(self, request):
+        """
+        Количество добавлений в избранное считается подзапросом
+        только для рецептов текущей страницы.
+        """
+        favorites = Favorite.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by().values('recipe').annotate(
+            count=Count('pk')
+        ).values('count')
+        return super().get_queryset(request).annotate(
+            favorites_count=Coalesce(
+                Subquery(favorites, output_field=IntegerField()), 0
+            )
+        )
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        form.instance.sync_tag_ids()
+        form.instance.sync_totals()
+
     def favorites_count(self, obj):
         """Возврашает количество добавлений Рецепта в избранное."""
-        return obj.favorites.count()
+        return obj.favorites_count
 
     favorites_count.short_description = 'Число добавлений рецепта в избранное'
+    favorites_count.admin_order_field = 'favorites_count'
+
+
+@admin.register(RecipeSignature)
+class RecipeSignatureAdmin(admin.ModelAdmin):
+    """Рецепты, отмеченные как почти одинаковые с более ранними."""
+
+    list_display = ('recipe', 'duplicate_of', 'similarity')
+    list_select_related = ('recipe', 'duplicate_of')
+    fields = ('recipe', 'duplicate_of', 'similarity')
+    readonly_fields = ('recipe', 'similarity')
+    raw_id_fields = ('duplicate_of',)
+    ordering = ('-similarity',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(
+            duplicate_of__isnull=False
+        )
+
+    def has_add_permission(self, request):
+        return False
 
 
 @admin.register(Amount)
 class AmountAdmin(admin.ModelAdmin):
     list_display = ('pk', 'recipe', 'ingredient', 'amount')
+    list_select_related = ('recipe', 'ingredient')
+    autocomplete_fields = ('recipe', 'ingredient')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(ShoppingList)
 class ShoppingListAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(MealPlan)
+class MealPlanAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'day', 'recipe', 'servings')
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    list_filter = ('day',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
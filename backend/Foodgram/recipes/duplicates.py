@@ -0,0 +1,192 @@
+import random
+import re
+from collections import defaultdict
+from hashlib import blake2b
+
+from django.conf import settings
+from django.db import transaction
+
+from recipes.models import Amount, Recipe, RecipeBucket, RecipeSignature
+
+# 16 полос по 8 значений: пара с Жаккаром s попадает в общую корзину
+# с вероятностью 1 - (1 - s^8)^16 — 0.9 при s = 0.8, 0.01 при s = 0.4.
+BANDS = 16
+ROWS = 8
+PRIME = (1 << 61) - 1
+SHINGLE_SIZE = 3
+
+_random = random.Random(20231019)
+PERMUTATIONS = [
+    (_random.randrange(1, PRIME), _random.randrange(0, PRIME))
+    for _ in range(BANDS * ROWS)
+]
+
+WORD = re.compile(r'\w+')
+
+
+def hash64(value):
+    return int.from_bytes(
+        blake2b(value.encode(), digest_size=8).digest(), 'big'
+    )
+
+
+def shingles(name, text, ingredient_ids):
+    """
+    Множество признаков рецепта: тройки слов нормализованного
+    названия и описания и id ингредиентов.
+    """
+    words = WORD.findall(f'{name} {text}'.lower().replace('ё', 'е'))
+    size = min(SHINGLE_SIZE, len(words)) or 1
+    features = {
+        ' '.join(words[index:index + size])
+        for index in range(max(len(words) - size + 1, 1))
+    }
+    features.update(f'ingredient:{pk}' for pk in ingredient_ids)
+    return features
+
+
+def minhash(features):
+    """MinHash-сигнатура множества: BANDS * ROWS минимумов."""
+    hashes = [hash64(feature) for feature in features]
+    return [
+        min((a * value + b) % PRIME for value in hashes)
+        for a, b in PERMUTATIONS
+    ]
+
+
+def signature(name, text, ingredient_ids):
+    return minhash(shingles(name, text, ingredient_ids))
+
+
+def band_keys(values):
+    """Ключи корзин LSH: по одному на полосу из ROWS значений."""
+    return [
+        int.from_bytes(blake2b(
+            repr((band, values[band * ROWS:(band + 1) * ROWS])).encode(),
+            digest_size=8
+        ).digest(), 'big', signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def similarity(first, second):
+    """Оценка коэффициента Жаккара по доле совпавших значений."""
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+def find_duplicates(signatures, threshold=None, earlier_only=True):
+    """
+    Ищет ранее сохраненные рецепты, похожие на рецепты из signatures
+    ({pk или None для нового рецепта: minhash}). Кандидаты берутся
+    из общих корзин LSH по индексу — два запроса на любое число
+    сигнатур — и проверяются по оценке Жаккара. Оригиналом считается
+    более ранний рецепт; с earlier_only=False — любой другой.
+    Возвращает {pk: (id оригинала, сходство)}.
+    """
+    if threshold is None:
+        threshold = settings.RECIPE_DUPLICATE_THRESHOLD
+    keys = {pk: band_keys(values) for pk, values in signatures.items()}
+    by_key = defaultdict(set)
+    for key, recipe_id in RecipeBucket.objects.filter(
+        key__in={key for values in keys.values() for key in values}
+    ).values_list('key', 'recipe_id'):
+        by_key[key].add(recipe_id)
+    candidates = {
+        pk: {
+            recipe_id for key in values for recipe_id in by_key[key]
+            if pk is None
+            or (recipe_id < pk if earlier_only else recipe_id != pk)
+        }
+        for pk, values in keys.items()
+    }
+    stored = dict(RecipeSignature.objects.filter(
+        recipe_id__in=set().union(*candidates.values())
+    ).values_list('recipe_id', 'minhash'))
+
+    duplicates = {}
+    for pk, recipe_ids in candidates.items():
+        matches = [
+            (similarity(signatures[pk], stored[recipe_id]), -recipe_id)
+            for recipe_id in recipe_ids if recipe_id in stored
+        ]
+        if matches:
+            score, recipe_id = max(matches)
+            if score >= threshold:
+                duplicates[pk] = (-recipe_id, score)
+    return duplicates
+
+
+def save_signatures(signatures, duplicates=None):
+    """
+    Сохраняет сигнатуры и корзины LSH рецептов {pk: minhash}
+    взамен прежних. duplicates — результат find_duplicates.
+    """
+    duplicates = duplicates or {}
+    with transaction.atomic():
+        RecipeBucket.objects.filter(recipe_id__in=signatures).delete()
+        RecipeSignature.objects.filter(recipe_id__in=signatures).delete()
+        RecipeSignature.objects.bulk_create(
+            RecipeSignature(
+                recipe_id=pk,
+                minhash=values,
+                duplicate_of_id=duplicates.get(pk, (None, None))[0],
+                similarity=duplicates.get(pk, (None, None))[1]
+            )
+            for pk, values in signatures.items()
+        )
+        RecipeBucket.objects.bulk_create(
+            RecipeBucket(recipe_id=pk, key=key)
+            for pk, values in signatures.items()
+            for key in band_keys(values)
+        )
+
+
+def check_recipe(name, text, ingredient_ids, pk=None, earlier_only=True):
+    """
+    Сигнатура рецепта при сохранении и его оригинал
+    (id, сходство) или None. Для нового рецепта pk=None,
+    сам рецепт в оригиналы не попадает.
+    """
+    values = signature(name, text, ingredient_ids)
+    return values, find_duplicates(
+        {pk: values}, earlier_only=earlier_only
+    ).get(pk)
+
+
+def index_range(first, last):
+    """Пересчитывает сигнатуры рецептов с id из [first, last]."""
+    ingredients = defaultdict(list)
+    for recipe_id, ingredient_id in Amount.objects.filter(
+        recipe_id__gte=first, recipe_id__lte=last
+    ).values_list('recipe_id', 'ingredient_id'):
+        ingredients[recipe_id].append(ingredient_id)
+    signatures = {
+        pk: signature(name, text, ingredients[pk])
+        for pk, name, text in Recipe.objects.filter(
+            pk__gte=first, pk__lte=last
+        ).values_list('pk', 'name', 'text')
+    }
+    save_signatures(signatures)
+    return len(signatures)
+
+
+def flag_range(first, last, threshold=None):
+    """
+    Отмечает дубликаты среди рецептов с id из [first, last]
+    по уже построенному индексу. Возвращает число дубликатов.
+    """
+    signatures = RecipeSignature.objects.filter(
+        recipe_id__gte=first, recipe_id__lte=last
+    )
+    duplicates = find_duplicates(
+        dict(signatures.values_list('recipe_id', 'minhash')), threshold
+    )
+    with transaction.atomic():
+        signatures.exclude(recipe_id__in=duplicates).update(
+            duplicate_of=None, similarity=None
+        )
+        for pk, (original_id, score) in duplicates.items():
+            RecipeSignature.objects.filter(recipe_id=pk).update(
+                duplicate_of=original_id, similarity=score
+            )
+    return len(duplicates)
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from recipes.recommendations import build_recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает похожие рецепты по совместным добавлениям '
+        'в избранное и список покупок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10,
+                            help='Сколько соседей хранить для рецепта.')
+        parser.add_argument('--block-size', type=int, default=1000,
+                            help='Сколько рецептов обрабатывать за проход.')
+        parser.add_argument('--max-user-items', type=int, default=500,
+                            help='Пропускать пользователей с большим '
+                                 'числом рецептов.')
+
+    def handle(self, *args, **options):
+        saved = build_recommendations(
+            top_k=options['top'],
+            block_size=options['block_size'],
+            max_user_items=options['max_user_items']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Сохранено пар похожих рецептов: {saved}.')
+        )
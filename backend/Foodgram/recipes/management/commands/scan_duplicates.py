@@ -0,0 +1,62 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from recipes.duplicates import flag_range, index_range
+from recipes.models import Recipe
+
+
+def run_batches(function, ranges, workers, *args):
+    """
+    Выполняет function(first, last, *args) для каждого диапазона id.
+    Процессы-обработчики создаются fork: соединения с БД закрываются
+    заранее, и каждый процесс открывает собственное.
+    """
+    if workers == 1:
+        return [function(first, last, *args) for first, last in ranges]
+    connections.close_all()
+    with ProcessPoolExecutor(workers, mp_context=get_context('fork')) as pool:
+        futures = [
+            pool.submit(function, first, last, *args)
+            for first, last in ranges
+        ]
+        return [future.result() for future in futures]
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит MinHash-сигнатуры и корзины LSH для всех рецептов '
+        'и отмечает почти одинаковые рецепты. Пакеты id обрабатываются '
+        'параллельно: сначала индекс, затем поиск дубликатов по нему.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Сколько рецептов в пакете.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Сколько процессов использовать.')
+        parser.add_argument('--threshold', type=float,
+                            default=settings.RECIPE_DUPLICATE_THRESHOLD,
+                            help='Минимальная оценка сходства по Жаккару.')
+
+    def handle(self, *args, **options):
+        recipe_ids = list(
+            Recipe.objects.order_by('pk').values_list('pk', flat=True)
+        )
+        size = options['batch_size']
+        ranges = [
+            (recipe_ids[start], recipe_ids[start:start + size][-1])
+            for start in range(0, len(recipe_ids), size)
+        ]
+        indexed = sum(run_batches(index_range, ranges, options['workers']))
+        flagged = sum(run_batches(
+            flag_range, ranges, options['workers'], options['threshold']
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано рецептов: {indexed}, '
+            f'отмечено дубликатов: {flagged}.'
+        ))
@@ -0,0 +1,134 @@
+from collections import defaultdict
+from itertools import combinations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import Recipe, Tag
+from users.models import User
+
+PREFIX = 'sync_recipe_tags_'
+
+
+def tag_ids_from_relations():
+    """id тегов каждого рецепта по таблице связей recipes_recipe_tags."""
+    tag_ids = defaultdict(list)
+    for recipe_id, tag_id in Recipe.tags.through.objects.order_by(
+        'tag_id'
+    ).values_list('recipe_id', 'tag_id'):
+        tag_ids[recipe_id].append(tag_id)
+    return tag_ids
+
+
+def stale_recipes():
+    """Рецепты, у которых tag_ids расходится с таблицей связей."""
+    expected = tag_ids_from_relations()
+    return {
+        pk: expected.get(pk, [])
+        for pk, tag_ids in Recipe.objects.values_list('pk', 'tag_ids')
+        if sorted(tag_ids) != expected.get(pk, [])
+    }
+
+
+def compare_filters(tag_sets):
+    """
+    Сравнивает выборки по tag_ids с выборками через JOIN по tags
+    для каждого набора тегов. Возвращает список расхождений.
+    """
+    mismatches = []
+    for ids in tag_sets:
+        any_join = Recipe.objects.filter(tags__in=ids).distinct()
+        all_join = Recipe.objects.all()
+        for pk in ids:
+            all_join = all_join.filter(tags=pk)
+        pairs = (
+            ('any', any_join, Recipe.objects.filter(tag_ids__overlap=ids)),
+            ('all', all_join, Recipe.objects.filter(tag_ids__contains=ids)),
+        )
+        for mode, by_join, by_array in pairs:
+            expected = set(by_join.values_list('pk', flat=True))
+            actual = set(by_array.values_list('pk', flat=True))
+            if expected != actual:
+                mismatches.append((mode, ids, expected ^ actual))
+    return mismatches
+
+
+def create_sample(tags):
+    """
+    Рецепты со всеми подмножествами из tags тегов. Один тег затем
+    удаляется, другой — снимается с рецептов: tag_ids должен
+    обновиться сигналами так же, как таблица связей.
+    """
+    author = User.objects.create(username=f'{PREFIX}author',
+                                 email=f'{PREFIX}author@example.com')
+    tags = [
+        Tag.objects.create(name=f'{PREFIX}{number}',
+                           color=f'#0000{number:02d}',
+                           slug=f'{PREFIX}{number}')
+        for number in range(tags)
+    ]
+    for size in range(len(tags) + 1):
+        for subset in combinations(tags, size):
+            recipe = Recipe.objects.create(
+                author=author, name=f'{PREFIX}{size}', text='-',
+                cooking_time=1, image='recipes/check.png'
+            )
+            recipe.tags.set(subset)
+            recipe.sync_tag_ids(subset)
+    tags[0].delete()
+    for recipe in Recipe.objects.filter(tags=tags[1])[::2]:
+        recipe.tags.remove(tags[1])
+        recipe.sync_tag_ids()
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает Recipe.tag_ids по таблице связей с тегами. '
+        'С --check только проверяет расхождения и совпадение фильтров '
+        'по tag_ids с фильтрами через JOIN.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Ничего не менять, завершиться ошибкой '
+                                 'при расхождениях.')
+        parser.add_argument('--sample', type=int, metavar='TAGS',
+                            help='С --check: проверить на собственных '
+                                 'рецептах со всеми сочетаниями TAGS '
+                                 'тегов в откатываемой транзакции (CI).')
+
+    def check_filters(self):
+        stale = stale_recipes()
+        tags = list(Tag.objects.values_list('pk', flat=True))
+        tag_sets = [[pk] for pk in tags]
+        tag_sets += [list(pair) for pair in combinations(tags, 2)]
+        if len(tags) > 2:
+            tag_sets.append(tags)
+        mismatches = compare_filters(tag_sets)
+        for mode, ids, pks in mismatches:
+            self.stdout.write(f'{mode} {ids}: расходятся рецепты {pks}')
+        if stale or mismatches:
+            raise CommandError(
+                f'Рецептов с устаревшими tag_ids: {len(stale)}, '
+                f'расхождений фильтров: {len(mismatches)}.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Фильтры совпадают для {len(tag_sets)} наборов тегов.'
+        ))
+
+    def handle(self, *args, **options):
+        if options['check'] and options['sample']:
+            with transaction.atomic():
+                create_sample(options['sample'])
+                self.check_filters()
+                transaction.set_rollback(True)
+            return
+        if options['check']:
+            return self.check_filters()
+
+        stale = stale_recipes()
+        for pk, tag_ids in stale.items():
+            Recipe.objects.filter(pk=pk).update(tag_ids=tag_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено рецептов: {len(stale)}.')
+        )
@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-19 08:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngredientChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ingredient_id', models.BigIntegerField(db_index=True, verbose_name='id ингредиента')),
+            ],
+            options={
+                'verbose_name': 'Изменение каталога ингредиентов',
+                'verbose_name_plural': 'Изменения каталога ингредиентов',
+            },
+        ),
+    ]
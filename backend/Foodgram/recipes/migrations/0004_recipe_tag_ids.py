@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-19 14:12
+
+from collections import defaultdict
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def fill_tag_ids(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    tag_ids = defaultdict(list)
+    for recipe_id, tag_id in Recipe.tags.through.objects.order_by(
+        'tag_id'
+    ).values_list('recipe_id', 'tag_id'):
+        tag_ids[recipe_id].append(tag_id)
+    for recipe_id, ids in tag_ids.items():
+        Recipe.objects.filter(pk=recipe_id).update(tag_ids=ids)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_ingredientchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='tag_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, editable=False, size=None, verbose_name='id тегов'),
+        ),
+        migrations.RunPython(fill_tag_ids, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tag_ids'], name='recipe_tag_ids_gin'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 3.2 on 2026-10-19 09:10
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_signatures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='calories',
+            field=models.FloatField(blank=True, help_text='На 100 г или 100 мл, для штучных единиц — на одну единицу.', null=True, validators=[django.core.validators.MinValueValidator(limit_value=0)], verbose_name='Калорийность, ккал'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='carbohydrates',
+            field=models.FloatField(blank=True, help_text='На 100 г или 100 мл, для штучных единиц — на одну единицу.', null=True, validators=[django.core.validators.MinValueValidator(limit_value=0)], verbose_name='Углеводы, г'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='fats',
+            field=models.FloatField(blank=True, help_text='На 100 г или 100 мл, для штучных единиц — на одну единицу.', null=True, validators=[django.core.validators.MinValueValidator(limit_value=0)], verbose_name='Жиры, г'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='price',
+            field=models.FloatField(blank=True, help_text='На 100 г или 100 мл, для штучных единиц — на одну единицу.', null=True, validators=[django.core.validators.MinValueValidator(limit_value=0)], verbose_name='Цена, руб.'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='proteins',
+            field=models.FloatField(blank=True, help_text='На 100 г или 100 мл, для штучных единиц — на одну единицу.', null=True, validators=[django.core.validators.MinValueValidator(limit_value=0)], verbose_name='Белки, г'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='calories',
+            field=models.FloatField(db_index=True, default=0, editable=False, verbose_name='Калорийность, ккал'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='carbohydrates',
+            field=models.FloatField(default=0, editable=False, verbose_name='Углеводы, г'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='fats',
+            field=models.FloatField(default=0, editable=False, verbose_name='Жиры, г'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='price',
+            field=models.FloatField(db_index=True, default=0, editable=False, verbose_name='Стоимость, руб.'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='proteins',
+            field=models.FloatField(default=0, editable=False, verbose_name='Белки, г'),
+        ),
+    ]
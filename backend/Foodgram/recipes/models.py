@@ -1,9 +1,13 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.core.validators import MinValueValidator
 from django.db import models
 
+from recipes.units import NUTRITION_FIELDS, nutrition_totals
 from users.models import User
 
 LETTER_LIMIT = 30
+NUTRITION_HELP = 'На 100 г или 100 мл, для штучных единиц — на одну единицу.'
 
 
 class Tag(models.Model):
@@ -38,6 +42,41 @@ class Ingredient(models.Model):
 
     name = models.CharField('Название', max_length=200)
     measurement_unit = models.CharField('Eдиница измерения', max_length=10)
+    calories = models.FloatField(
+        'Калорийность, ккал',
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(limit_value=0)],
+        help_text=NUTRITION_HELP
+    )
+    proteins = models.FloatField(
+        'Белки, г',
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(limit_value=0)],
+        help_text=NUTRITION_HELP
+    )
+    fats = models.FloatField(
+        'Жиры, г',
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(limit_value=0)],
+        help_text=NUTRITION_HELP
+    )
+    carbohydrates = models.FloatField(
+        'Углеводы, г',
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(limit_value=0)],
+        help_text=NUTRITION_HELP
+    )
+    price = models.FloatField(
+        'Цена, руб.',
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(limit_value=0)],
+        help_text=NUTRITION_HELP
+    )
 
     class Meta:
         verbose_name = 'Ингредиент'
@@ -47,6 +86,22 @@ class Ingredient(models.Model):
         return self.name[:LETTER_LIMIT]
 
 
+class IngredientChange(models.Model):
+    """
+    Журнал изменений каталога ингредиентов.
+    id записи является версией каталога.
+    """
+
+    ingredient_id = models.BigIntegerField('id ингредиента', db_index=True)
+
+    class Meta:
+        verbose_name = 'Изменение каталога ингредиентов'
+        verbose_name_plural = 'Изменения каталога ингредиентов'
+
+    def __str__(self):
+        return f'{self.pk}: {self.ingredient_id}'
+
+
 class Recipe(models.Model):
     """Модель Рецепта."""
 
@@ -81,15 +136,71 @@ class Recipe(models.Model):
         'Время приготовления',
         validators=[MinValueValidator(limit_value=1)]
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+        db_index=True
+    )
+    tag_ids = ArrayField(
+        models.BigIntegerField(),
+        verbose_name='id тегов',
+        default=list,
+        blank=True,
+        editable=False
+    )
+    calories = models.FloatField(
+        'Калорийность, ккал',
+        default=0,
+        editable=False,
+        db_index=True
+    )
+    proteins = models.FloatField('Белки, г', default=0, editable=False)
+    fats = models.FloatField('Жиры, г', default=0, editable=False)
+    carbohydrates = models.FloatField(
+        'Углеводы, г',
+        default=0,
+        editable=False
+    )
+    price = models.FloatField(
+        'Стоимость, руб.',
+        default=0,
+        editable=False,
+        db_index=True
+    )
 
     class Meta:
         ordering = ['-id']
+        indexes = [
+            GinIndex(fields=['tag_ids'], name='recipe_tag_ids_gin'),
+        ]
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
     def __str__(self):
         return self.name[:LETTER_LIMIT]
 
+    def sync_tag_ids(self, tags=None):
+        """
+        Обновляет денормализованный список id тегов, по которому
+        фильтруется лента (GIN-индекс вместо JOIN по tags и DISTINCT).
+        Без tags связи читаются из базы.
+        """
+        if tags is None:
+            tags = self.tags.all()
+        self.tag_ids = sorted(tag.pk for tag in tags)
+        Recipe.objects.filter(pk=self.pk).update(tag_ids=self.tag_ids)
+
+    def sync_totals(self):
+        """
+        Пересчитывает суммарную пищевую ценность и стоимость по составу.
+        Вызывается при каждом изменении ингредиентов рецепта, чтобы
+        список и фильтры читали готовые колонки, а не агрегат.
+        """
+        totals = self.amounts.aggregate(**nutrition_totals())
+        for field in NUTRITION_FIELDS:
+            setattr(self, field, totals[field])
+        Recipe.objects.filter(pk=self.pk).update(**totals)
+
 
 class Amount(models.Model):
     """
@@ -186,3 +297,138 @@ class ShoppingList(models.Model):
     def __str__(self):
         return (f'{self.recipe.name} в списке покупок '
                 f'у {self.user.username}'[:LETTER_LIMIT])
+
+
+class MealPlan(models.Model):
+    """
+    Модель Плана питания: рецепт на день.
+    servings — во сколько раз увеличить количества ингредиентов рецепта.
+    """
+
+    user = models.ForeignKey(
+        User,
+        related_name='meal_plans',
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='meal_plans',
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE
+    )
+    day = models.DateField('День')
+    servings = models.PositiveSmallIntegerField(
+        'Порции',
+        default=1,
+        validators=[MinValueValidator(limit_value=1)]
+    )
+
+    class Meta:
+        ordering = ['day', 'id']
+        indexes = [
+            models.Index(
+                fields=['user', 'day'],
+                name='meal_plan_user_day_idx'
+            ),
+        ]
+        verbose_name = 'План питания'
+        verbose_name_plural = 'Планы питания'
+
+    def __str__(self):
+        return f'{self.day}: {self.recipe_id} x{self.servings}'
+
+
+class SimilarRecipe(models.Model):
+    """
+    Похожий рецепт: ближайший сосед по совместным добавлениям
+    в избранное и список покупок. Заполняется командой
+    build_recommendations.
+    """
+
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='similar_recipes',
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        related_name='+',
+        verbose_name='Похожий рецепт',
+        on_delete=models.CASCADE
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        ordering = ['recipe', '-score']
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'],
+                name='similar_recipe_idx'
+            ),
+        ]
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+
+    def __str__(self):
+        return f'{self.recipe_id} -> {self.similar_id}: {self.score:.3f}'
+
+
+class RecipeSignature(models.Model):
+    """
+    MinHash-сигнатура текста и состава рецепта для поиска
+    почти одинаковых рецептов. duplicate_of — более ранний рецепт,
+    на который этот похож не меньше чем на порог сходства.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        primary_key=True,
+        related_name='signature',
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE
+    )
+    minhash = ArrayField(
+        models.BigIntegerField(),
+        verbose_name='MinHash'
+    )
+    duplicate_of = models.ForeignKey(
+        Recipe,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Похож на рецепт',
+        on_delete=models.SET_NULL
+    )
+    similarity = models.FloatField('Сходство', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Сигнатура рецепта'
+        verbose_name_plural = 'Сигнатуры рецептов'
+
+    def __str__(self):
+        return f'{self.recipe_id} ~ {self.duplicate_of_id}'
+
+
+class RecipeBucket(models.Model):
+    """
+    Корзина LSH: хеш полосы MinHash-сигнатуры. Рецепты с общей
+    корзиной — кандидаты в дубликаты, поиск идет по индексу key.
+    """
+
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='+',
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE
+    )
+    key = models.BigIntegerField('Ключ корзины', db_index=True)
+
+    class Meta:
+        verbose_name = 'Корзина LSH'
+        verbose_name_plural = 'Корзины LSH'
+
+    def __str__(self):
+        return f'{self.key}: {self.recipe_id}'
@@ -0,0 +1,132 @@
+import heapq
+import math
+from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import Q
+
+from recipes.models import Favorite, Recipe, ShoppingList, SimilarRecipe
+
+# Вес взаимодействия: избранное — сильный сигнал, список покупок — слабее.
+WEIGHTS = (
+    (Favorite, 1.0),
+    (ShoppingList, 0.5),
+)
+CHUNK_SIZE = 5000
+
+
+def weighted_pairs(queryset, weight):
+    """Пары (пользователь, рецепт, вес) из queryset курсором."""
+    pairs = queryset.values_list('user_id', 'recipe_id').iterator(CHUNK_SIZE)
+    for user_id, recipe_id in pairs:
+        yield user_id, recipe_id, weight
+
+
+def user_items(recipe_range=None):
+    """
+    Потоково отдает рецепты каждого пользователя: {recipe_id: вес}.
+    Пары из Favorite и ShoppingList читаются курсорами, отсортированными
+    по пользователю, и сливаются без загрузки таблиц в память.
+    С recipe_range — только пользователи, взаимодействовавшие
+    с рецептами из этого диапазона id.
+    """
+    users = Q()
+    if recipe_range is not None:
+        for model, _ in WEIGHTS:
+            users |= Q(user_id__in=model.objects.filter(
+                recipe_id__gte=recipe_range[0],
+                recipe_id__lte=recipe_range[1]
+            ).values('user_id'))
+
+    streams = [
+        weighted_pairs(
+            model.objects.filter(users).order_by('user_id', 'recipe_id'),
+            weight
+        )
+        for model, weight in WEIGHTS
+    ]
+    for _, group in groupby(heapq.merge(*streams), key=itemgetter(0)):
+        items = {}
+        for _, recipe_id, weight in group:
+            items[recipe_id] = max(weight, items.get(recipe_id, 0))
+        yield items
+
+
+def recipe_norms(max_user_items):
+    """Норма вектора каждого рецепта по пользователям: sqrt(sum(w^2))."""
+    norms = defaultdict(float)
+    for items in user_items():
+        if len(items) > max_user_items:
+            continue
+        for recipe_id, weight in items.items():
+            norms[recipe_id] += weight * weight
+    return {recipe_id: math.sqrt(value) for recipe_id, value in norms.items()}
+
+
+def block_neighbours(first, last, norms, top_k, max_user_items):
+    """
+    Косинусное сходство рецептов с id из [first, last] со всеми
+    остальными. Читаются только пользователи, взаимодействовавшие
+    с рецептами блока, в памяти — строки матрицы сходства только
+    для рецептов блока. Возвращает {recipe_id: [(score, similar_id)]}.
+    """
+    co_counts = defaultdict(lambda: defaultdict(float))
+    for items in user_items((first, last)):
+        if len(items) > max_user_items:
+            continue
+        for recipe_id, weight in items.items():
+            if not first <= recipe_id <= last:
+                continue
+            row = co_counts[recipe_id]
+            for other_id, other_weight in items.items():
+                if other_id != recipe_id:
+                    row[other_id] += weight * other_weight
+
+    return {
+        recipe_id: heapq.nlargest(top_k, (
+            (count / (norms[recipe_id] * norms[other_id]), other_id)
+            for other_id, count in row.items()
+        ))
+        for recipe_id, row in co_counts.items()
+    }
+
+
+def build_recommendations(top_k=10, block_size=1000, max_user_items=500):
+    """
+    Пересобирает таблицу SimilarRecipe: top_k соседей каждого рецепта.
+    Рецепты обрабатываются блоками по block_size id, поэтому память
+    ограничена размером блока, а не квадратом числа рецептов.
+    Пользователи с более чем max_user_items рецептами пропускаются:
+    они дают квадратичное число пар и почти не несут сигнала.
+    Возвращает количество сохраненных пар.
+    """
+    norms = recipe_norms(max_user_items)
+    recipe_ids = list(
+        Recipe.objects.order_by('pk').values_list('pk', flat=True)
+    )
+    saved = 0
+    for start in range(0, len(recipe_ids), block_size):
+        block = recipe_ids[start:start + block_size]
+        first, last = block[0], block[-1]
+        neighbours = block_neighbours(
+            first, last, norms, top_k, max_user_items
+        )
+        rows = [
+            SimilarRecipe(
+                recipe_id=recipe_id,
+                similar_id=similar_id,
+                score=round(score, 6)
+            )
+            for recipe_id, pairs in neighbours.items()
+            for score, similar_id in pairs
+        ]
+        with transaction.atomic():
+            SimilarRecipe.objects.filter(
+                recipe_id__gte=first,
+                recipe_id__lte=last
+            ).delete()
+            SimilarRecipe.objects.bulk_create(rows, batch_size=CHUNK_SIZE)
+        saved += len(rows)
+    return saved
@@ -0,0 +1,77 @@
+from django.db.models import F, FloatField, Func, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Now
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from recipes.models import Amount, Ingredient, IngredientChange, Recipe, Tag
+from recipes.units import nutrition_totals
+
+
+def update_totals(recipes):
+    """
+    Пересчитывает пищевую ценность и стоимость рецептов queryset
+    одним UPDATE с подзапросами по Amount.
+    """
+    amounts = Amount.objects.filter(
+        recipe=OuterRef('pk')
+    ).order_by().values('recipe')
+    recipes.update(updated_at=Now(), **{
+        field: Coalesce(
+            Subquery(amounts.annotate(total=total).values('total'),
+                     output_field=FloatField()),
+            Value(0.0)
+        )
+        for field, total in nutrition_totals().items()
+    })
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def log_ingredient_change(sender, instance, **kwargs):
+    """Записывает изменение каталога ингредиентов в журнал."""
+    IngredientChange.objects.create(ingredient_id=instance.pk)
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_recipes(sender, instance, created, **kwargs):
+    """Пересчитывает итоги рецептов при изменении данных ингредиента."""
+    if not created:
+        update_totals(Recipe.objects.filter(amounts__ingredient=instance))
+
+
+@receiver(pre_delete, sender=Ingredient)
+def remember_ingredient_recipes(sender, instance, **kwargs):
+    """Запоминает рецепты ингредиента: после удаления связей не будет."""
+    instance.recipe_ids = list(Amount.objects.filter(
+        ingredient=instance
+    ).values_list('recipe_id', flat=True))
+
+
+@receiver(post_delete, sender=Ingredient)
+def update_deleted_ingredient_recipes(sender, instance, **kwargs):
+    """Пересчитывает итоги рецептов, из которых удален ингредиент."""
+    recipe_ids = getattr(instance, 'recipe_ids', None)
+    if recipe_ids:
+        update_totals(Recipe.objects.filter(pk__in=recipe_ids))
+
+
+@receiver(post_save, sender=Tag)
+def touch_tag_recipes(sender, instance, created, **kwargs):
+    """
+    Обновляет дату изменения рецептов с измененным тегом:
+    тег входит в ответ рецепта, и ETag должен измениться.
+    """
+    if not created:
+        Recipe.objects.filter(tag_ids__contains=[instance.pk]).update(
+            updated_at=Now()
+        )
+
+
+@receiver(post_delete, sender=Tag)
+def remove_tag_id(sender, instance, **kwargs):
+    """Убирает id удаленного тега из Recipe.tag_ids."""
+    Recipe.objects.filter(tag_ids__contains=[instance.pk]).update(
+        tag_ids=Func(F('tag_ids'), Value(instance.pk),
+                     function='array_remove'),
+        updated_at=Now()
+    )
@@ -0,0 +1,87 @@
+from django.db.models import Case, F, FloatField, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+# Единица измерения: (базовая единица, множитель перевода в базовую).
+UNITS = {
+    'мг': ('г', 0.001),
+    'г': ('г', 1),
+    'кг': ('г', 1000),
+    'мл': ('мл', 1),
+    'л': ('мл', 1000),
+    'ч. л.': ('мл', 5),
+    'ст. л.': ('мл', 15),
+}
+
+# Пищевая ценность и цена ингредиента указываются на 100 базовых
+# единиц (100 г или 100 мл), для прочих единиц — на одну единицу.
+REFERENCE_AMOUNT = 100
+NUTRITION_FIELDS = ('calories', 'proteins', 'fats', 'carbohydrates', 'price')
+
+# Базовая единица: (крупная единица, множитель), в которую переводится
+# итоговое количество, если оно не меньше множителя.
+DISPLAY_UNITS = {
+    'г': ('кг', 1000),
+    'мл': ('л', 1000),
+}
+
+
+def base_unit(field='ingredient__measurement_unit'):
+    """SQL-выражение базовой единицы измерения."""
+    return Case(
+        *[When(**{field: unit}, then=Value(base))
+          for unit, (base, factor) in UNITS.items()],
+        default=F(field)
+    )
+
+
+def base_amount(amount='amount', field='ingredient__measurement_unit'):
+    """SQL-выражение количества, переведенного в базовую единицу."""
+    return F(amount) * Case(
+        *[When(**{field: unit}, then=Value(factor))
+          for unit, (base, factor) in UNITS.items()],
+        default=Value(1.0),
+        output_field=FloatField()
+    )
+
+
+def reference_portions(amount='amount', field='ingredient__measurement_unit'):
+    """
+    SQL-выражение количества в эталонных порциях, на которые указана
+    пищевая ценность ингредиента: 250 г -> 2.5, 2 шт. -> 2.
+    """
+    return F(amount) * Case(
+        *[When(**{field: unit}, then=Value(factor / REFERENCE_AMOUNT))
+          for unit, (base, factor) in UNITS.items()],
+        default=Value(1.0),
+        output_field=FloatField()
+    )
+
+
+def nutrition_totals(prefix='ingredient__'):
+    """
+    Агрегаты суммарной пищевой ценности и цены по строкам Amount.
+    Ингредиенты без данных не учитываются.
+    """
+    return {
+        field: Coalesce(
+            Sum(reference_portions() * F(f'{prefix}{field}'),
+                output_field=FloatField()),
+            Value(0.0)
+        )
+        for field in NUTRITION_FIELDS
+    }
+
+
+def humanize(amount, unit):
+    """
+    Переводит количество в базовой единице в удобную для чтения:
+    1500 г -> 1.5 кг. Целые значения возвращаются как int.
+    """
+    if unit in DISPLAY_UNITS:
+        display_unit, factor = DISPLAY_UNITS[unit]
+        if amount >= factor:
+            amount, unit = amount / factor, display_unit
+    amount = round(amount, 3)
+    if float(amount).is_integer():
+        amount = int(amount)
+    return amount, unit
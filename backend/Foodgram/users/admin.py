@@ -1,19 +1,26 @@
 from django.contrib import admin
 
+from Foodgram.db import EstimatedCountPaginator
+from Foodgram.deletion import CascadeDeleteAdminMixin
 from users.models import Subscription, User
 
 admin.site.empty_value_display = '-пусто-'
 
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(CascadeDeleteAdminMixin, admin.ModelAdmin):
     list_display = ('pk', 'email', 'username', 'first_name', 'last_name')
     search_fields = ('email', 'username', 'first_name', 'last_name')
-    list_filter = ('email', 'username')
+    list_filter = ('is_staff', 'is_active')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'author')
-    search_fields = ('user', 'author')
-    list_filter = ('user', 'author')
+    list_select_related = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    autocomplete_fields = ('user', 'author')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
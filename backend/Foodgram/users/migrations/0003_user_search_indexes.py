@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# Поиск по началу строки без учета регистра (istartswith) строится
+# как UPPER(поле::text) LIKE UPPER('abc%'). Индексы по тому же
+# выражению с text_pattern_ops подходят для LIKE с префиксом
+# при любой сортировке базы. Django 3.2 не описывает индексы
+# по выражению с классом операторов, поэтому они создаются SQL.
+SEARCH_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS user_{field}_upper_idx '
+            f'ON users_user (UPPER({field}::text) text_pattern_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(
+            f'DROP INDEX CONCURRENTLY IF EXISTS user_{field}_upper_idx'
+        )
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY не блокирует таблицу пользователей,
+    # но не выполняется внутри транзакции.
+    atomic = False
+
+    dependencies = [
+        ('users', '0002_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -26,6 +26,11 @@ class User(AbstractUser):
         blank=False,
         null=False
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+        db_index=True
+    )
 
     class Meta:
         ordering = ['-id']